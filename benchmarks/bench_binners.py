@@ -0,0 +1,77 @@
+"""
+Benchmark strappy.utils.binners.cutter against the previous
+pandas.cut / multi-mask implementation
+
+Run with:
+$ python benchmarks/bench_binners.py [n_rows]
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from strappy.utils.binners import cutter, cutpoints, _fit_bins, _finalize_bins
+
+
+def legacy_cutter(df, x, max_levels=20, point_mass_threshold=0.1,
+                  sig_fig=3, fillna="MISSING", **kwargs):
+    """cutter as implemented before the array kernel"""
+    df = df.loc[:,[x]].copy()
+    cnts = df[x].value_counts(normalize=True)
+    pm = cnts[cnts > point_mass_threshold].index.values
+    pm.sort()
+    if len(pm) == 0:
+        x_no_nan = ~np.isnan(df.loc[:,x].values)
+        cps = cutpoints(df.loc[x_no_nan,x].values, ncuts = max_levels, **kwargs)
+    else:
+        rem = df.loc[~df[x].isin(pm),[x]]
+        x_no_nan = ~np.isnan(rem.loc[:,x].values)
+        if len(rem.loc[x_no_nan,x].values) > 0:
+            cps = cutpoints(rem.loc[x_no_nan,x].values, ncuts = max_levels, **kwargs)
+        else:
+            cps = np.array([])
+    c_final, bin_labels, pm_labels = _finalize_bins(cps,pm,sig_fig=sig_fig)
+    df.loc[~df[x].isin(pm),x + '_BINNED'] = pd.cut(
+        df.loc[~df[x].isin(pm),x].values,
+        c_final,
+        labels=bin_labels,
+        include_lowest=True).astype(str)
+    eps = 10e-6
+    df.loc[lambda df: (df[x] >= c_final[0] - eps) & (df[x] <= c_final[0] + eps), x + "_BINNED"] = bin_labels[0]
+    for i,v in enumerate(pm):
+        df.loc[df[x] == v,x + '_BINNED'] = pm_labels[i]
+    final_labels = bin_labels+pm_labels
+    final_labels.sort()
+    return (pd.Categorical(
+        df.loc[:,x + '_BINNED'].values,
+        categories = final_labels)
+        .add_categories(fillna)
+        .fillna(fillna))
+
+
+def _time(f, *args, **kwargs):
+    start = time.perf_counter()
+    res = f(*args, **kwargs)
+    return time.perf_counter() - start, res
+
+
+def main(n=10_000_000):
+    rng = np.random.default_rng(0)
+    x = rng.lognormal(size=n)
+    x[rng.random(n) < 0.15] = 0
+    x[rng.random(n) < 0.05] = np.nan
+    df = pd.DataFrame({'x': x})
+
+    t_fit, _ = _time(_fit_bins, df['x'], max_levels=20)
+    t_new, new = _time(cutter, df, 'x', 20)
+    t_old, old = _time(legacy_cutter, df, 'x', 20)
+    assert pd.Series(new).equals(pd.Series(old))
+    print(f"rows: {n:,}")
+    print(f"cutter (legacy):    {t_old:7.2f}s")
+    print(f"cutter (kernel):    {t_new:7.2f}s  (of which fitting bins {t_fit:.2f}s)")
+    print(f"speedup:            {t_old / t_new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
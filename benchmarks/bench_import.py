@@ -0,0 +1,52 @@
+"""
+Import time of the strappy modules used by scoring workers, each
+measured in a fresh interpreter with `python -X importtime`
+
+Exits with status 1 if a module is over its budget or loads one of
+the heavy optional dependencies.
+
+Run with:
+$ python benchmarks/bench_import.py [n_runs]
+"""
+
+import sys
+import subprocess
+
+# budget in seconds for the cumulative import time of each module,
+# including pandas and numpy (about 0.5s on a laptop)
+BUDGETS = {
+    'strappy': 0.05,
+    'strappy.transformers': 0.05,
+    'strappy.monitoring.psi': 1.0,
+    'strappy.utils.binners': 1.0,
+}
+
+HEAVY = ['matplotlib', 'sklearn', 'scipy', 'feature_engine', 'tomllib', 'tomli']
+
+
+def _import_time(module):
+    """cumulative import time of module in seconds, and the heavy modules it loads"""
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+    res = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True)
+    last = [l for l in res.stderr.splitlines() if l.startswith('import time:')][-1]
+    return int(last.split('|')[1]) / 1e6, res.stdout.strip()
+
+
+def main(n_runs=5):
+    ok = True
+    for module, budget in BUDGETS.items():
+        runs = [_import_time(module) for _ in range(n_runs)]
+        t = min(r[0] for r in runs)
+        heavy = runs[0][1]
+        status = 'ok' if t <= budget and not heavy else 'OVER'
+        ok &= status == 'ok'
+        print(f"{module:28s} {t:6.3f}s  budget {budget:5.2f}s  {status}"
+              + (f"  loads {heavy}" if heavy else ""))
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 5) else 1)
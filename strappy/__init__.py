@@ -1,10 +1,20 @@
-from importlib import resources
-
-try:
-    import tomllib
-except ModuleNotFoundError:
-    import tomli as tomllib
+from functools import lru_cache
 
 __version__ = "0.6.0"
 
-_cfg = tomllib.loads(resources.read_text("strappy", "config.toml"))
\ No newline at end of file
+
+@lru_cache(maxsize=None)
+def _load_config():
+    """Parse config.toml, once, the first time `strappy._cfg` is used"""
+    from importlib import resources # pylint: disable=import-outside-toplevel
+    try:
+        import tomllib # pylint: disable=import-outside-toplevel
+    except ModuleNotFoundError:
+        import tomli as tomllib # pylint: disable=import-outside-toplevel
+    return tomllib.loads(resources.read_text("strappy", "config.toml"))
+
+
+def __getattr__(name):
+    if name == "_cfg":
+        return _load_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,21 +3,11 @@ Base pipeline constructs a pipeline of
 generic transformations for easy EDA
 """
 
+from importlib import import_module
 from typing import Union, Tuple, List
 import numpy as np
 import pandas as pd
 
-from feature_engine.imputation import (
-    ArbitraryNumberImputer,
-    AddMissingIndicator,
-    CategoricalImputer
-)
-
-from feature_engine.encoding import (
-    RareLabelEncoder,
-    OneHotEncoder
-)
-
 from ..transformers._variable_selector import MakeColumnSelector
 from ..transformers._text_vectorizer import VectorizeText
 
@@ -25,6 +15,22 @@ from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.exceptions import NotFittedError
 
+# feature_engine is only imported when a pipeline is built or inspected
+_FEATURE_ENGINE = {
+    'ArbitraryNumberImputer': 'feature_engine.imputation',
+    'AddMissingIndicator': 'feature_engine.imputation',
+    'CategoricalImputer': 'feature_engine.imputation',
+    'RareLabelEncoder': 'feature_engine.encoding',
+    'OneHotEncoder': 'feature_engine.encoding',
+}
+
+
+def __getattr__(name):
+    if name in _FEATURE_ENGINE:
+        return getattr(import_module(_FEATURE_ENGINE[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def create_transformer_pipeline(params=None, text_cols : Union[None,list]=None):
     """
     Pipeline for preprocessing transformations
@@ -41,6 +47,17 @@ def create_transformer_pipeline(params=None, text_cols : Union[None,list]=None):
     combined_pipe : sklearn.pipeline.Pipeline
         A pipeline to fit
     """
+    # pylint: disable=import-outside-toplevel
+    from feature_engine.imputation import (
+        ArbitraryNumberImputer,
+        AddMissingIndicator,
+        CategoricalImputer
+    )
+    from feature_engine.encoding import (
+        RareLabelEncoder,
+        OneHotEncoder
+    )
+
     p_num = Pipeline([
         ("add_missing_ind", AddMissingIndicator()),
         ("arb_num_imputer", ArbitraryNumberImputer(arbitrary_number=0))
@@ -207,6 +224,10 @@ def _name_tracker_pipeline(pipeline:Pipeline):
     -------
     names : dict
     """
+    # pylint: disable=import-outside-toplevel
+    from feature_engine.imputation import AddMissingIndicator
+    from feature_engine.encoding import OneHotEncoder
+
     if not isinstance(pipeline, Pipeline):
         raise TypeError("`pipeline` must be a sklearn.pipeline.Pipeline " +
         f"but received {type(pipeline)}")
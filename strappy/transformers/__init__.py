@@ -1,7 +1,16 @@
 """Init transformers"""
-from ._categorical_binners import MaxLevelBinner
-from ._categorical_binners import PercentThresholdBinner
-from ._categorical_binners import CumulativePercentThresholdBinner
+from importlib import import_module
+
+# Transformers are imported from their submodules on first access, so
+# importing strappy.transformers does not load scikit-learn
+_LAZY = {
+    # from _categorical_binners
+    'MaxLevelBinner': '._categorical_binners',
+    'PercentThresholdBinner': '._categorical_binners',
+    'CumulativePercentThresholdBinner': '._categorical_binners',
+    # from _numeric_binner
+    'NumericBinner': '._numeric_binner',
+}
 
 #from ._numeric_transformers import OutlierPercentileCapper
 
@@ -11,7 +20,21 @@ __all__ = [
     # from _categorical_binners
     'MaxLevelBinner',
     'PercentThresholdBinner',
-    'CumulativePercentThresholdBinner'
+    'CumulativePercentThresholdBinner',
+    # from _numeric_binner
+    'NumericBinner',
     # _numeric_transformers
     #'OutlierPercentileCapper',
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
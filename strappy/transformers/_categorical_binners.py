@@ -3,10 +3,71 @@ Module of categorical binners
 """
 
 from typing import Union, Optional, List
+import numpy as np
 import pandas as pd
 
 from sklearn.base import BaseEstimator, TransformerMixin
 
+from ..utils.sketches import FrequentItemsSketch
+
+_OUTPUTS = ("object", "category", "codes")
+
+
+def _codes_dtype(n):
+    """Smallest signed integer dtype that can hold codes 0..n and -1"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _is_dictionary_encoded(dtype):
+    """True for pandas category and Arrow dictionary dtypes"""
+    if isinstance(dtype, pd.CategoricalDtype):
+        return True
+    arrow_dtype = getattr(pd, "ArrowDtype", None)
+    if arrow_dtype is not None and isinstance(dtype, arrow_dtype):
+        import pyarrow as pa # pylint: disable=import-outside-toplevel
+        return pa.types.is_dictionary(dtype.pyarrow_dtype)
+    return False
+
+
+_SEP = "\x00"
+
+
+def _pack_levels(levels):
+    """
+    Compact, pickle-friendly form of fitted levels: string levels are
+    stored as a single NUL-separated UTF-8 buffer instead of one
+    Python object per level
+    """
+    if len(levels) and pd.api.types.infer_dtype(levels, skipna=False) == "string":
+        joined = _SEP.join(levels)
+        if joined.count(_SEP) == len(levels) - 1:
+            return (joined.encode("utf-8"),)
+    return levels
+
+
+def _unpack_levels(packed):
+    """Inverse of `_pack_levels`"""
+    if isinstance(packed, tuple):
+        return pd.Index(packed[0].decode("utf-8").split(_SEP), dtype=object)
+    return packed
+
+
+def _as_categorical(x):
+    """
+    Return the pandas.Categorical behind a dictionary-encoded Series,
+    or None if `x` is not dictionary-encoded. Arrow dictionary arrays
+    are converted without decoding their values.
+    """
+    if isinstance(x.dtype, pd.CategoricalDtype):
+        return x.array
+    if _is_dictionary_encoded(x.dtype):
+        return x.array.__arrow_array__().to_pandas().array
+    return None
+
+
 class CategoricalBinnerMixin(TransformerMixin, BaseEstimator): # pylint: disable=too-few-public-methods
     """Mixin for Categorical binners"""
     @staticmethod
@@ -28,6 +89,34 @@ class CategoricalBinnerMixin(TransformerMixin, BaseEstimator): # pylint: disable
         if len(set(X.columns.tolist())) != X.shape[1]:
             raise ValueError("Duplicate column names")
 
+    @property
+    def map(self):
+        """
+        Identity mapping of the fitted levels of each variable, including
+        a selected missing level
+        """
+        missing = getattr(self, '_missing_levels', {})
+        res = {}
+        for z, levels in self.levels_.items():
+            levels = list(levels)
+            for i, l in missing.get(z, []):
+                levels.insert(i, l)
+            res[z] = {l:l for l in levels}
+        return res
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        if 'levels_' in state:
+            state = dict(state)
+            state['levels_'] = {z: _pack_levels(l) for z, l in state['levels_'].items()}
+        return state
+
+    def __setstate__(self, state):
+        if 'levels_' in state:
+            state = dict(state)
+            state['levels_'] = {z: _unpack_levels(l) for z, l in state['levels_'].items()}
+        super().__setstate__(state)
+
     def get_feature_names_out(self) -> list:
         if self.variables_ is not None:
             return self.variables_
@@ -37,19 +126,210 @@ class CategoricalBinnerMixin(TransformerMixin, BaseEstimator): # pylint: disable
         if self.variables_ is None:
             variables = []
             for v in X.columns:
-                if X[v].dtype in ["object", pd.StringDtype, pd.CategoricalDtype]:
+                dtype = X[v].dtype
+                if (pd.api.types.is_object_dtype(dtype) or
+                        pd.api.types.is_string_dtype(dtype) or
+                        _is_dictionary_encoded(dtype)):
                     variables.append(v)
             self.variables_ = self._check_variables(variables)
         else:
             self._check_X(X)
-            if not all([col in self.variables_ for col in X.columns.tolist()]):
-                missing = [col for col in X.columns.tolist() if col not in self.variables_]
+            missing = [str(col) for col in self.variables_ if col not in X.columns]
+            if missing:
                 raise ValueError(f"`X` is missing the columns {', '.join(missing)}")
 
+    @staticmethod
+    def _level_counts(X, z):
+        """
+        Row count of every level of `z`, including missing values.
+        Dictionary-encoded columns are counted from their codes, and
+        categories that do not occur are dropped. Levels are sorted with
+        missing values last, whatever the dtype.
+        """
+        cat = _as_categorical(X[z])
+        if cat is None:
+            return X.groupby(z,dropna=False).size()
+        cnts = np.bincount(
+            np.add(cat.codes, 1, dtype=np.intp),
+            minlength=len(cat.categories) + 1)
+        observed = cnts[1:] > 0
+        levels = cat.categories[observed]
+        values = cnts[1:][observed]
+        # sorted by value, as groupby sorts other dtypes, not in category order
+        order = levels.argsort()
+        levels, values = levels[order], values[order]
+        if cnts[0] > 0:
+            levels = levels.append(pd.Index([np.nan]))
+            values = np.append(values, cnts[0])
+        return pd.Series(values.astype('int64'), index=levels.rename(z))
+
+    @staticmethod
+    def _add_counts(cnts, new_cnts):
+        """Add two level count Series, keeping the groupby ordering"""
+        return cnts.add(new_cnts, fill_value=0) \
+                   .astype('int64') \
+                   .sort_index(na_position='last')
+
+    def _fit_counts(self, counts):
+        """Build the fitted levels of every variable from level counts"""
+        self.levels_ = {} # pylint: disable=attribute-defined-outside-init
+        self._missing_levels = {} # pylint: disable=attribute-defined-outside-init
+        for z in self.variables_:
+            self._store_levels(z, self._select_levels(counts[z], z))
+
+    def fit(self, X, y : Optional[pd.Series] = None): # pylint: disable=unused-argument
+        """
+        Fit method
+
+        Parameters
+        ----------
+        X : pandas.DataFrame
+        """
+        self._check_or_select_variables(X)
+        if hasattr(self, 'counts_'):
+            del self.counts_
+            del self.n_samples_seen_
+        self._fit_counts({z: self._level_counts(X, z) for z in self.variables_})
+        return self
+
+    def fit_from_counts(self, counts : dict):
+        """
+        Fit from precomputed level counts instead of rows, e.g. the
+        result of a `GROUP BY` in a database
+
+        Produces the same fitted levels as `fit` on the rows the counts
+        were computed from, at O(levels) cost.
+
+        Parameters
+        ----------
+        counts : dict
+            maps each variable to its level counts as a pandas.Series
+            or dict of {level: count}. Missing values may be included
+            as a NaN level.
+
+        Returns
+        -------
+        self
+        """
+        if self.variables_ is None:
+            self.variables_ = self._check_variables(list(counts.keys()))
+        missing = [str(z) for z in self.variables_ if z not in counts]
+        if missing:
+            raise ValueError(f"`counts` is missing the variables {', '.join(missing)}")
+        for attr in ('counts_', 'sketches_', 'n_samples_seen_'):
+            if hasattr(self, attr):
+                delattr(self, attr)
+        self._fit_counts({
+            z: pd.Series(counts[z]).rename_axis(z).sort_index(na_position='last')
+            for z in self.variables_})
+        return self
+
+    def partial_fit(self, X, y : Optional[pd.Series] = None): # pylint: disable=unused-argument
+        """
+        Incrementally fit on a chunk of rows
+
+        Level counts and the number of rows are accumulated across calls
+        in `counts_` and `n_samples_seen_`, so memory is bounded by the
+        number of distinct levels rather than the number of rows. After
+        each call the binner is fitted as if `fit` had been called on
+        all chunks seen so far. Calling `fit` discards the accumulated
+        counts.
+
+        Parameters
+        ----------
+        X : pandas.DataFrame
+        """
+        self._check_or_select_variables(X)
+        if not hasattr(self, 'counts_'):
+            self.counts_ = {} # pylint: disable=attribute-defined-outside-init
+            self.n_samples_seen_ = 0 # pylint: disable=attribute-defined-outside-init
+        for z in self.variables_:
+            cnts = self._level_counts(X, z)
+            if z in self.counts_:
+                cnts = self._add_counts(self.counts_[z], cnts)
+            self.counts_[z] = cnts
+        self.n_samples_seen_ += X.shape[0]
+        self._fit_counts(self.counts_)
+        return self
+
+    @staticmethod
+    def _check_output(output):
+        if output not in _OUTPUTS:
+            raise ValueError(
+                f"`output` must be one of {', '.join(_OUTPUTS)} but received {output}")
+        return output
+
+    def _store_levels(self, z, levels):
+        """Record the fitted levels of variable `z`"""
+        index = pd.Index(levels)
+        missing = index.isna()
+        self.levels_[z] = index[~missing]
+        if missing.any():
+            # kept only for `map`, as missing values are never binned
+            self._missing_levels[z] = [
+                (i, levels[i]) for i in np.flatnonzero(missing)]
+
+    def _categories(self, z):
+        """
+        Output categories for variable `z` and the code of `other_val`
+
+        Returns
+        -------
+        categories : pandas.Index
+            fitted levels followed by `other_val` (unless `other_val`
+            is itself a fitted level)
+
+        other_code : int
+            position of `other_val` in `categories`
+        """
+        levels = self.levels_[z]
+        if self.other_val in levels:
+            return levels, levels.get_loc(self.other_val)
+        return levels.append(pd.Index([self.other_val])), len(levels)
+
+    def _encode(self, x, z):
+        """
+        Encode one column against the fitted levels of `z` with a single
+        hash lookup. Missing values get code -1 and unseen levels get the
+        code of `other_val`.
+
+        Parameters
+        ----------
+        x : pandas.Series
+
+        z : str or int
+            name of the fitted variable
+
+        Returns
+        -------
+        codes : numpy 1-D array of integers
+
+        categories : pandas.Index
+        """
+        categories, other_code = self._categories(z)
+        dtype = _codes_dtype(len(categories))
+        cat = _as_categorical(x)
+        if cat is not None:
+            # only the categories are looked up; the codes are remapped
+            remap = self.levels_[z].get_indexer(cat.categories)
+            remap[remap < 0] = other_code
+            remap = np.append(remap, -1).astype(dtype)
+            return remap.take(cat.codes), categories
+        codes = self.levels_[z].get_indexer(x)
+        unmatched = codes < 0
+        if unmatched.any():
+            codes[unmatched] = np.where(
+                pd.isna(np.asarray(x)[unmatched]), -1, other_code)
+        return codes.astype(dtype), categories
+
     def transform(self, X : pd.DataFrame):
         """
         Default transform method
 
+        Only the binned columns are written; all other columns of `X`
+        are shared with the input rather than copied. With `copy=False`
+        the binned columns are written into `X` itself.
+
         Parameters
         ----------
         X : pandas.DataFrame
@@ -57,27 +337,56 @@ class CategoricalBinnerMixin(TransformerMixin, BaseEstimator): # pylint: disable
         Returns
         -------
         pandas.DataFrame
+            binned columns hold the fitted levels and `other_val` as
+            objects (`output='object'`), a `pandas.Categorical`
+            (`output='category'`) or integer codes into the fitted levels
+            followed by `other_val` (`output='codes'`). Missing values are
+            preserved (code -1).
         """
-
-        X = X.copy()
+        output = self._check_output(self.output)
+        if self.copy:
+            X = X.copy(deep=False)
 
         for z in self.variables_:
-            X.loc[-X[z].isna(),z] = X.loc[-X[z].isna(),z] \
-                .map(self.map[z]).fillna(self.other_val)
+            codes, categories = self._encode(X[z], z)
+            if output == "codes":
+                X[z] = codes
+            elif output == "category":
+                X[z] = pd.Categorical.from_codes(codes, categories)
+            else:
+                lookup = np.append(categories.to_numpy(dtype=object), np.nan)
+                X[z] = lookup.take(codes)
 
         return X
 
-class MaxLevelBinner(CategoricalBinnerMixin):        
+class MaxLevelBinner(CategoricalBinnerMixin):
     """
     MaxLevelBinner
+
+    With `sketch_size` set, levels are counted approximately with a
+    mergeable FrequentItemsSketch of at most `sketch_size` counters per
+    variable instead of an exact count of every distinct level. The
+    sketches are kept in `sketches_` and the maximum undercount of any
+    level in `error_bound_`.
     """
     def __init__(self, variables: Union[None, int, str, List[Union[str, int]]] = None,
-                 max_levels = 20, other_val = '_OTHER_'):
+                 max_levels = 20, other_val = '_OTHER_', output = 'object', copy = True,
+                 sketch_size: Optional[int] = None):
         self.variables_ = self._check_variables(variables)
         self.max_levels = max_levels
         self.other_val = other_val
+        self.output = self._check_output(output)
+        self.copy = copy
+        if sketch_size is not None and sketch_size < max_levels:
+            raise ValueError("`sketch_size` must be at least `max_levels`")
+        self.sketch_size = sketch_size
 
-    def fit(self, X, y : Optional[pd.Series] = None): # pylint: disable=unused-argument
+    def _select_levels(self, cnts, z): # pylint: disable=unused-argument
+        cnts = cnts.sort_values(ascending = False) \
+                   .head(self.max_levels)
+        return cnts.index.tolist()
+
+    def fit(self, X, y : Optional[pd.Series] = None):
         """
         Fit method
 
@@ -85,42 +394,76 @@ class MaxLevelBinner(CategoricalBinnerMixin):
         ----------
         X : pandas.DataFrame
         """
-        self.map = {} # pylint: disable=attribute-defined-outside-init
+        if self.sketch_size is None:
+            return super().fit(X, y)
+        if hasattr(self, 'sketches_'):
+            del self.sketches_
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y : Optional[pd.Series] = None):
+        """
+        Incrementally fit on a chunk of rows
+
+        Parameters
+        ----------
+        X : pandas.DataFrame
+        """
+        if self.sketch_size is None:
+            return super().partial_fit(X, y)
         self._check_or_select_variables(X)
+        if not hasattr(self, 'sketches_'):
+            self.sketches_ = { # pylint: disable=attribute-defined-outside-init
+                z: FrequentItemsSketch(self.sketch_size) for z in self.variables_}
         for z in self.variables_:
-            cnts = X.groupby(z,dropna=False).size() \
-                     .sort_values(ascending = False) \
-                     .head(self.max_levels)
-            levels = cnts.index.tolist()
-            self.map[z] = {l:l for l in levels}
+            self.sketches_[z].update(X[z])
+        self._fit_sketches()
         return self
 
+    def merge(self, other):
+        """
+        Merge the sketches of another MaxLevelBinner fitted with
+        `sketch_size` on different rows, e.g. by another worker
+
+        Parameters
+        ----------
+        other : MaxLevelBinner
+
+        Returns
+        -------
+        self
+        """
+        if not hasattr(self, 'sketches_') or not hasattr(other, 'sketches_'):
+            raise ValueError("Both binners must be fitted with `sketch_size`")
+        for z in self.variables_:
+            self.sketches_[z].merge(other.sketches_[z])
+        self._fit_sketches()
+        return self
+
+    def _fit_sketches(self):
+        self.n_samples_seen_ = max( # pylint: disable=attribute-defined-outside-init
+            (sk.n for sk in self.sketches_.values()), default=0)
+        self.error_bound_ = { # pylint: disable=attribute-defined-outside-init
+            z: sk.error_bound for z, sk in self.sketches_.items()}
+        self._fit_counts({
+            z: sk.counts.rename_axis(z).sort_index(na_position='last')
+            for z, sk in self.sketches_.items()})
+
 
 class PercentThresholdBinner(CategoricalBinnerMixin):
     """
     PercentThresholdBinner
     """
     def __init__(self, variables: Union[None, int, str, List[Union[str, int]]] = None,
-        percent_threshold = 0.02, other_val = '_OTHER_'):
+        percent_threshold = 0.02, other_val = '_OTHER_', output = 'object', copy = True):
         self.variables_ = self._check_variables(variables)
         self.percent_threshold = percent_threshold
         self.other_val = other_val
+        self.output = self._check_output(output)
+        self.copy = copy
 
-    def fit(self, X, y : Optional[pd.Series] = None): # pylint: disable=unused-argument
-        """
-        Fit method
-
-        Parameters
-        ----------
-        df : pandas.DataFrame
-        """
-        self.map = {} # pylint: disable=attribute-defined-outside-init
-        self._check_or_select_variables(X)
-        for z in self.variables_:
-            cnts = (X.groupby(z,dropna=False).size() / X.shape[0])
-            levels = cnts[cnts>=self.percent_threshold].index.tolist()
-            self.map[z] = {l:l for l in levels}
-        return self
+    def _select_levels(self, cnts, z): # pylint: disable=unused-argument
+        cnts = cnts / cnts.sum()
+        return cnts[cnts>=self.percent_threshold].index.tolist()
 
 
 class CumulativePercentThresholdBinner(CategoricalBinnerMixin):
@@ -128,27 +471,17 @@ class CumulativePercentThresholdBinner(CategoricalBinnerMixin):
     CumulativePercentThresholdBinner
     """
     def __init__(self, variables: Union[None, int, str, List[Union[str, int]]] = None,
-        cum_percent = 0.95, other_val = '_OTHER_'):
+        cum_percent = 0.95, other_val = '_OTHER_', output = 'object', copy = True):
         self.variables_ = self._check_variables(variables)
         self.cum_percent = cum_percent
         self.other_val = other_val
+        self.output = self._check_output(output)
+        self.copy = copy
 
-    def fit(self, X, y=None): # pylint: disable=unused-argument
-        """
-        Fit method
-
-        Parameters
-        ----------
-        X : pandas.DataFrame
-        """
-        self.map = {} # pylint: disable=attribute-defined-outside-init
-        self._check_or_select_variables(X)
-        for z in self.variables_:
-            cnts = (X.groupby(z,dropna=False).size() / X.shape[0]) \
-                      .to_frame(name = z + '_perc').reset_index() \
-                      .sort_values([z + '_perc',z], ascending = [False,True]) \
-                      .set_index(z) \
-                      .cumsum().shift(periods=1, fill_value=0)
-            levels = cnts[cnts[z + '_perc']<=self.cum_percent].index.tolist()
-            self.map[z] = {l:l for l in levels}
-        return self
+    def _select_levels(self, cnts, z):
+        cnts = (cnts / cnts.sum()) \
+                  .to_frame(name = z + '_perc').reset_index() \
+                  .sort_values([z + '_perc',z], ascending = [False,True]) \
+                  .set_index(z) \
+                  .cumsum().shift(periods=1, fill_value=0)
+        return cnts[cnts[z + '_perc']<=self.cum_percent].index.tolist()
@@ -0,0 +1,196 @@
+"""
+Numeric binner
+"""
+
+from typing import Union, Optional, List
+import numpy as np
+import pandas as pd
+
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from ..utils.binners import _fit_bins, _label_order, _bin_codes
+from ..utils.sketches import NumericSketch
+
+_OUTPUTS = ("codes", "category")
+
+
+class NumericBinner(TransformerMixin, BaseEstimator):
+    """
+    Bin numeric variables with the same bins as
+    `strappy.utils.binners.cutter`, computed once at fit time
+
+    The bin endpoints, point masses and labels of each variable are
+    stored in `bins_`, `point_masses_` and `labels_`. `transform`
+    assigns bins with a single sorted search and returns integer codes
+    into `labels_[variable]` (-1 for missing or out of range values),
+    or a pandas.Categorical with `fillna` as the last category.
+
+    `partial_fit` summarizes each variable chunk by chunk in a mergeable
+    NumericSketch (`sketches_`) instead of holding the data, so bins can
+    be built on data that does not fit in memory. Quantile-based
+    cutpoints are then within `rank_error_` of the exact ones.
+
+    Parameters
+    ----------
+    variables : None, int, str or list
+        variables to bin. If None, all numeric columns are binned
+
+    max_levels : int
+        maximum number of bins to create per variable
+
+    point_mass_threshold : float
+        Levels with frequency greater than point_mass_threshold
+        get their own bin
+
+    sig_fig : int
+        Significant figures to use in the bin labels
+
+    qntl_cutoff : list or None
+        see `strappy.utils.binners.cutpoints`
+
+    cuts : str
+        see `strappy.utils.binners.cutpoints`
+
+    fillna : str
+        category used for missing values when `output='category'`
+
+    output : str
+        'codes' or 'category'
+
+    copy : bool
+        if False, binned columns are written into `X` itself
+
+    sketch_size : int
+        accuracy parameter `k` of the QuantileSketch used by `partial_fit`
+    """
+    def __init__(self, variables: Union[None, int, str, List[Union[str, int]]] = None,
+                 max_levels = 20, point_mass_threshold = 0.1, sig_fig = 3,
+                 qntl_cutoff = (0.025, 0.975), cuts = 'linear', fillna = 'MISSING',
+                 output = 'codes', copy = True, sketch_size = 200):
+        self.variables = variables
+        self.max_levels = max_levels
+        self.point_mass_threshold = point_mass_threshold
+        self.sig_fig = sig_fig
+        self.qntl_cutoff = qntl_cutoff
+        self.cuts = cuts
+        self.fillna = fillna
+        self.output = output
+        self.copy = copy
+        self.sketch_size = sketch_size
+
+    def _check_variables(self, X):
+        variables = self.variables
+        if variables is None:
+            return X.select_dtypes(include=np.number).columns.tolist()
+        if isinstance(variables, (str, int)):
+            variables = [variables]
+        missing = [str(v) for v in variables if v not in X.columns]
+        if missing:
+            raise ValueError(f"`X` is missing the columns {', '.join(missing)}")
+        return list(variables)
+
+    def fit(self, X : pd.DataFrame, y : Optional[pd.Series] = None): # pylint: disable=unused-argument
+        """
+        Fit method
+
+        Parameters
+        ----------
+        X : pandas.DataFrame
+        """
+        self.variables_ = self._check_variables(X) # pylint: disable=attribute-defined-outside-init
+        if hasattr(self, 'sketches_'):
+            del self.sketches_
+            del self.rank_error_
+        self._fit_bins({z: X[z] for z in self.variables_})
+        return self
+
+    def partial_fit(self, X : pd.DataFrame, y : Optional[pd.Series] = None): # pylint: disable=unused-argument
+        """
+        Incrementally fit on a chunk of rows
+
+        Parameters
+        ----------
+        X : pandas.DataFrame
+        """
+        if not hasattr(self, 'sketches_'):
+            self.variables_ = self._check_variables(X) # pylint: disable=attribute-defined-outside-init
+            self.sketches_ = { # pylint: disable=attribute-defined-outside-init
+                z: NumericSketch(self.sketch_size) for z in self.variables_}
+        for z in self.variables_:
+            self.sketches_[z].update(X[z])
+        self._fit_sketches()
+        return self
+
+    def merge(self, other):
+        """
+        Merge the sketches of another NumericBinner fitted with
+        `partial_fit` on different rows, e.g. by another worker
+
+        Parameters
+        ----------
+        other : NumericBinner
+
+        Returns
+        -------
+        self
+        """
+        if not hasattr(self, 'sketches_') or not hasattr(other, 'sketches_'):
+            raise ValueError("Both binners must be fitted with `partial_fit`")
+        for z in self.variables_:
+            self.sketches_[z].merge(other.sketches_[z])
+        self._fit_sketches()
+        return self
+
+    def _fit_sketches(self):
+        self.rank_error_ = { # pylint: disable=attribute-defined-outside-init
+            z: sk.quantiles.rank_error for z, sk in self.sketches_.items()}
+        self._fit_bins(self.sketches_)
+
+    def _fit_bins(self, sources):
+        """Compute the bins of every variable from its values or sketch"""
+        self.bins_ = {} # pylint: disable=attribute-defined-outside-init
+        self.point_masses_ = {} # pylint: disable=attribute-defined-outside-init
+        self.labels_ = {} # pylint: disable=attribute-defined-outside-init
+        self._order = {} # pylint: disable=attribute-defined-outside-init
+        for z in self.variables_:
+            c_final, pm, bin_labels, pm_labels = _fit_bins(
+                sources[z], max_levels=self.max_levels,
+                point_mass_threshold=self.point_mass_threshold,
+                sig_fig=self.sig_fig,
+                qntl_cutoff=None if self.qntl_cutoff is None else list(self.qntl_cutoff),
+                cuts=self.cuts)
+            self.bins_[z] = c_final
+            self.point_masses_[z] = pm
+            self.labels_[z], self._order[z] = _label_order(bin_labels, pm_labels)
+
+    def transform(self, X : pd.DataFrame):
+        """
+        Transform method
+
+        Parameters
+        ----------
+        X : pandas.DataFrame
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        if self.output not in _OUTPUTS:
+            raise ValueError(
+                f"`output` must be one of {', '.join(_OUTPUTS)} but received {self.output}")
+        if self.copy:
+            X = X.copy(deep=False)
+        for z in self.variables_:
+            X[z] = self._transform_one(X[z], z)
+        return X
+
+    def _transform_one(self, x, z):
+        labels = self.labels_[z]
+        codes = _bin_codes(x, self.bins_[z], self.point_masses_[z], self._order[z])
+        if self.output == "codes":
+            return codes
+        codes[codes < 0] = len(labels)
+        return pd.Categorical.from_codes(codes, labels + [self.fillna])
+
+    def get_feature_names_out(self) -> list:
+        return self.variables_
@@ -0,0 +1,18 @@
+"""
+Compatibility with the older pandas versions allowed by requirements.txt
+"""
+
+import pandas as pd
+
+# pandas 1.5 replaced factorize's na_sentinel with use_na_sentinel
+_PANDAS_GE_15 = tuple(int(p) for p in pd.__version__.split('.')[:2]) >= (1, 5)
+
+
+def factorize_keep_na(values, sort=False):
+    """
+    pandas.factorize with missing values coded as a level of their own,
+    like pandas.factorize(values, sort=sort, use_na_sentinel=False)
+    """
+    if _PANDAS_GE_15:
+        return pd.factorize(values, sort=sort, use_na_sentinel=False)
+    return pd.factorize(values, sort=sort, na_sentinel=None)
@@ -0,0 +1,294 @@
+"""
+Histogram aggregates computed from factorized codes, independently
+of any plotting
+"""
+
+import numpy as np
+import pandas as pd
+
+from ._compat import factorize_keep_na
+from .binners import cutter, human_readable_nums, _weights
+from .sketches import more_distinct_than
+
+# statistics computed with bincount, other pandas aggregations fall
+# back to a groupby on the codes
+STATS = ('count', 'sum', 'mean', 'rate')
+
+
+def _numeric_levels(df, x, max_levels=20, binner=True, weights=None, **kwargs):
+    """
+    Codes and labels of the levels of a numeric variable: the bins from
+    `cutter`, or each distinct value (missing last) if binner is False
+
+    Returns
+    -------
+    codes : numpy 1-D array of int
+
+    labels : pandas.Categorical or numpy 1-D array of str
+    """
+    if binner:
+        z = cutter(df, x, max_levels, weights=weights, **kwargs)
+        labels = pd.Categorical(z.categories, categories=z.categories)
+        return z.codes, labels
+    codes, uniques = factorize_keep_na(df[x], sort=True)
+    labels = [str(i+1).zfill(2) + ": " + j
+              for i, j in enumerate(human_readable_nums(uniques).tolist())]
+    return codes, np.array(labels, dtype=object)
+
+
+def _categorical_levels(df, x, max_levels=20, oth_val='_OTHER_'):
+    """
+    Codes and labels of the `max_levels` levels of a categorical variable
+    with the most records, all other levels becoming `oth_val`. Labels
+    are sorted and missing values get code -1
+
+    Returns
+    -------
+    codes : numpy 1-D array of int
+
+    labels : numpy 1-D array
+    """
+    codes, uniques = pd.factorize(df[x], sort=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    # ties go to the level that sorts first
+    keep = np.zeros(len(uniques), dtype=bool)
+    keep[np.argsort(-counts, kind='stable')[:max_levels]] = True
+    groups = np.where(keep, np.asarray(uniques, dtype=object), oth_val)
+    group_codes, labels = pd.factorize(groups, sort=True)
+    codes = np.where(codes >= 0, group_codes[codes], -1)
+    return codes, np.asarray(labels, dtype=object)
+
+
+def _group_stats(codes, n_levels, y, stats, weights=None):
+    """
+    Statistics of `y` within each level of `codes` (-1 is ignored),
+    each of 'count', 'sum', 'mean' and 'rate' from one bincount pass
+
+    Parameters
+    ----------
+    codes : numpy 1-D array of int
+
+    n_levels : int
+
+    y : pandas.Series
+
+    stats : list of str
+        'count' (non-missing values), 'sum', 'mean', 'rate' (share of
+        non-missing values that are non-zero) or any other pandas
+        aggregation
+
+    weights : numpy 1-D array
+        optional weight of each row
+
+    Returns
+    -------
+    dict of stat name to numpy 1-D array of length n_levels
+    """
+    res = {}
+    # 'count' works on any dtype, the others need numbers
+    numeric = pd.api.types.is_numeric_dtype(y) or pd.api.types.is_bool_dtype(y)
+    fast = [s for s in stats if s == 'count' or (numeric and s in STATS)]
+    if fast:
+        ok = (codes >= 0) & y.notna().to_numpy()
+        c = codes[ok]
+        wts = None if weights is None else weights[ok]
+        count = np.bincount(c, weights=wts, minlength=n_levels)
+        if numeric:
+            v = y.to_numpy(dtype=float, na_value=np.nan)[ok]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for stat in fast:
+                if stat == 'count':
+                    res[stat] = count
+                elif stat == 'rate':
+                    nonzero = (v != 0) if wts is None else (v != 0) * wts
+                    res[stat] = np.bincount(c, weights=nonzero, minlength=n_levels) / count
+                elif stat == 'sum' and wts is None and y.dtype.kind in 'biu':
+                    # summed as integers, as float64 is not exact above 2**53
+                    dtype = np.uint64 if y.dtype.kind == 'u' else np.int64
+                    total = np.zeros(n_levels, dtype=dtype)
+                    np.add.at(total, c, y.to_numpy(dtype=dtype, na_value=0)[ok])
+                    res[stat] = total
+                else:
+                    total = np.bincount(
+                        c, weights=v if wts is None else v * wts, minlength=n_levels)
+                    res[stat] = total if stat == 'sum' else total / count
+    for stat in stats:
+        if stat in res:
+            continue
+        if weights is not None:
+            raise ValueError(
+                f"`stat` must be one of {', '.join(STATS)} when using `weights`")
+        valid = codes >= 0
+        res[stat] = y[valid].groupby(codes[valid]).agg(stat) \
+            .reindex(range(n_levels)).to_numpy()
+    return res
+
+
+def _level_counts(codes, n_levels, weights=None):
+    """(weighted) number of rows in each level of `codes`"""
+    valid = codes >= 0
+    return np.bincount(
+        codes[valid], weights=None if weights is None else weights[valid],
+        minlength=n_levels)
+
+
+def _histogram_frame(df, x, codes, labels, oth_columns, stat, weights=None):
+    """
+    Wide histogram table, as plotted by `plot_bar`: the levels of 'x',
+    `stat` of each of `oth_columns` and the count of rows `_COUNT_`
+    """
+    p = {x: labels}
+    for col in oth_columns:
+        p[col] = _group_stats(codes, len(labels), df[col], [stat], weights)[stat]
+    p['_COUNT_'] = _level_counts(codes, len(labels), weights)
+    return pd.DataFrame(p)
+
+
+def histogram_table(
+    df,
+    x,
+    line_columns = None,
+    stats = 'mean',
+    max_levels = 20,
+    min_levels = 20,
+    binner = None,
+    oth_val = '_OTHER_',
+    weights = None,
+    **kwargs):
+    '''
+    Compute the aggregates behind `numeric_histogram` and
+    `categorical_histogram` without plotting them
+
+    Numeric variables are binned with `cutter` if they have more than
+    min_levels distinct values, categorical variables keep their
+    max_levels most frequent levels. All statistics of a line column
+    come from a single pass over its values.
+
+    Parameters
+    --------------------------
+    df : pandas DataFrame object
+
+    x : the name of the variable in 'df' to construct levels from
+
+    line_columns : optional list of other columns in 'df' on which to
+        calculate 'stats' within levels of 'x'
+
+    stats : str or list of str
+        'count', 'sum', 'mean', 'rate' (share of non-zero values) or
+        other pandas aggregations
+
+    max_levels : maximum number of levels to create from 'x'
+
+    min_levels : a numeric 'x' with more than min_levels distinct
+        values is binned
+
+    binner : if given, whether to bin a numeric 'x' regardless of
+        min_levels
+
+    oth_val : level for the less frequent values of a categorical 'x'
+
+    weights : optional column of 'df', or array, with the weight of
+        each row
+
+    Returns
+    ---------------------------
+    pandas DataFrame with columns 'x', 'variable', 'stat' and 'value':
+        for each level, the number of rows (variable 'x', stat 'count')
+        and each of 'stats' of each of 'line_columns'
+    '''
+    if line_columns is None:
+        line_columns = []
+    elif isinstance(line_columns, str):
+        line_columns = [line_columns]
+    if isinstance(stats, str):
+        stats = [stats]
+    w = _weights(df, weights)
+
+    if pd.api.types.is_numeric_dtype(df[x]) and not pd.api.types.is_bool_dtype(df[x]):
+        if binner is None:
+            binner = more_distinct_than(df[x], min_levels)
+        codes, labels = _numeric_levels(
+            df, x, max_levels=max_levels, binner=binner, weights=w, **kwargs)
+    else:
+        codes, labels = _categorical_levels(
+            df, x, max_levels=max_levels, oth_val=oth_val)
+    labels = np.asarray(labels, dtype=object)
+    n = len(labels)
+
+    blocks = [(x, 'count', _level_counts(codes, n, w))]
+    for col in line_columns:
+        res = _group_stats(codes, n, df[col], stats, w)
+        blocks.extend((col, stat, res[stat]) for stat in stats)
+    return pd.DataFrame({
+        x: np.tile(labels, len(blocks)),
+        'variable': np.repeat([b[0] for b in blocks], n),
+        'stat': np.repeat([b[1] for b in blocks], n),
+        'value': np.concatenate([np.asarray(b[2], dtype=float) for b in blocks]),
+        })
+
+
+def contingency_table(
+    df,
+    x,
+    y,
+    max_levels = None,
+    oth_val = '_OTHER_',
+    fillna = 'MISSING'):
+    '''
+    Number of rows of each combination of the levels of two categorical
+    variables, and of each level of either, from one pass over their codes
+
+    Parameters
+    --------------------------
+    df : pandas DataFrame object
+
+    x : the name of the variable in 'df' along the columns
+
+    y : the name of the variable in 'df' along the rows
+
+    max_levels : optional maximum number of levels of each variable. The
+        max_levels levels with the most records keep their own level, all
+        others are counted as 'oth_val'
+
+    oth_val : level for the less frequent values
+
+    fillna : level for missing values
+
+    Returns
+    ---------------------------
+    table : pandas DataFrame object
+        counts with the levels of 'y' as index and those of 'x' as
+        columns, NaN where a combination does not occur
+
+    x_counts, y_counts : pandas Series objects
+        counts of the levels of 'x' and 'y'
+    '''
+    xcodes, xlabels = _filled_levels(df, x, max_levels, oth_val, fillna)
+    ycodes, ylabels = _filled_levels(df, y, max_levels, oth_val, fillna)
+    return _joint_counts(
+        xcodes, pd.Index(xlabels, name=x), ycodes, pd.Index(ylabels, name=y))
+
+
+def _joint_counts(xcodes, xindex, ycodes, yindex):
+    """
+    Contingency table of two arrays of codes (-1 is ignored) with its
+    column and row sums, labelled by `xindex` and `yindex`
+    """
+    nx, ny = len(xindex), len(yindex)
+    valid = (xcodes >= 0) & (ycodes >= 0)
+    keys = ycodes[valid].astype(np.intp) * nx + xcodes[valid]
+    joint = np.bincount(keys, minlength=nx * ny).reshape(ny, nx)
+    table = pd.DataFrame(joint, index=yindex, columns=xindex)
+    if not joint.all():
+        table = table.where(joint > 0)
+    return (table,
+            pd.Series(joint.sum(axis=0), index=xindex),
+            pd.Series(joint.sum(axis=1), index=yindex))
+
+
+def _filled_levels(df, x, max_levels=None, oth_val='_OTHER_', fillna='MISSING'):
+    """`_categorical_levels` of 'x' with missing values as level `fillna`"""
+    col = df[x]
+    if fillna is not None and col.hasnans:
+        col = col.fillna(fillna)
+    return _categorical_levels(col.to_frame(x), x, max_levels=max_levels, oth_val=oth_val)
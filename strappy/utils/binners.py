@@ -3,11 +3,20 @@ Binner functions for grouping numeric variables into
 bins
 """
 
-import re
+import os
 import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, lru_cache
 import numpy as np
 import pandas as pd
 
+from .sketches import QuantileSketch, NumericSketch
+
+# rows read at a time from memory-mapped arrays, and the accuracy of
+# the sketch summarizing them (rank error about 0.15%)
+_BLOCK_SIZE = 2**20
+_SKETCH_SIZE = 2000
+
 
 def cutpoints(
     x,
@@ -15,14 +24,17 @@ def cutpoints(
     cuts='linear',
     ncuts=10,
     sig_fig=3,
+    weights=None,
     **kwargs):
     '''
     Function to return cut points and bin labels for a numeric 1-D array
 
     Parameters
     ----------
-    x : numpy 1-D array
-        numeric 1-D array
+    x : numpy 1-D array or QuantileSketch
+        numeric 1-D array, or a QuantileSketch summarizing one. With a
+        sketch, quantiles are within its `rank_error`. A numpy.memmap
+        is read in blocks into a QuantileSketch instead of being loaded
 
     qntl_cutoff : list
         list of length two with lower and upper quantile cutoffs:
@@ -47,30 +59,145 @@ def cutpoints(
         number of significant figures to display in the aesthetically
         printed bin labels
 
+    weights : numpy 1-D array
+        optional non-negative weight (e.g. count) of each element of x.
+        Quantiles are then those of x with each element repeated
+        `weights` times
+
     Returns
     -------
     c_final : numpy 1-D array
         final cut points
     '''
 
+    if isinstance(x, np.memmap):
+        if weights is not None:
+            raise ValueError("`weights` cannot be used with a numpy.memmap")
+        sketch = QuantileSketch(_SKETCH_SIZE)
+        for block in _blocks(x):
+            sketch.update(block)
+        x = sketch
+    if isinstance(x, QuantileSketch):
+        if weights is not None:
+            raise ValueError("`weights` cannot be used with a QuantileSketch")
+        quantile = x.quantile
+        lb, ub = x.min, x.max
+    elif weights is not None:
+        x, weights = _drop_missing(x, weights)
+        quantile = partial(_weighted_quantile, x, weights)
+        lb, ub = np.min(x), np.max(x)
+    else:
+        quantile = partial(np.quantile, x)
+        lb, ub = np.nanmin(x), np.nanmax(x)
+
+    ep_q, cq_q = _quantile_probs(qntl_cutoff, cuts, ncuts)
+    ep = quantile(ep_q) if ep_q is not None else None
+    cq = quantile(cq_q) if cq_q is not None else None
+    return _cutpoints(lb, ub, ep, cq, cuts=cuts, ncuts=ncuts, sig_fig=sig_fig)
+
+
+def _drop_missing(x, weights):
+    """
+    Numeric values and weights without missing values, missing weights
+    or zero weights
+    """
+    x = np.asarray(x, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    if x.shape != weights.shape:
+        raise ValueError("`weights` must have the same length as the values")
+    if np.any(weights < 0):
+        raise ValueError("`weights` must be non-negative")
+    keep = ~np.isnan(x) & ~np.isnan(weights) & (weights > 0)
+    return x[keep], weights[keep]
+
+
+def _weighted_quantile(x, weights, q):
+    """
+    Quantiles of x with each element repeated `weights` times
+
+    For integer weights this equals `numpy.quantile` (linear method)
+    of the repeated values, computed from the cumulative weights
+    without repeating anything.
+
+    Parameters
+    ----------
+    x : numpy 1-D array without missing values
+
+    weights : numpy 1-D array of positive weights
+
+    q : float or array-like of floats in [0, 1]
+
+    Returns
+    -------
+    float or numpy.array
+    """
+    order = np.argsort(x, kind='stable')
+    xs = x[order]
+    cum = np.cumsum(weights[order])
+    q = np.asarray(q, dtype=float)
+    # position of q among the repeated values, and its neighbours
+    h = np.maximum(q * (cum[-1] - 1), 0)
+    lo = np.floor(h)
+    t = h - lo
+    a = xs[np.minimum(np.searchsorted(cum, lo, side='right'), len(xs) - 1)]
+    b = xs[np.minimum(np.searchsorted(cum, lo + 1, side='right'), len(xs) - 1)]
+    # linear interpolation as numpy.quantile does it
+    diff = b - a
+    res = np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+    return res if res.ndim else float(res)
+
+
+def _quantile_probs(qntl_cutoff, cuts, ncuts):
+    """
+    Probabilities of the quantiles `cutpoints` needs: the outlier
+    cutoffs (None if not used) and the quantile cuts (None unless
+    cuts='quantile')
+    """
+    ep_q = None
+    if (qntl_cutoff is not None and
+            len(qntl_cutoff) == 2 and
+            isinstance(qntl_cutoff[0],float) and
+            isinstance(qntl_cutoff[1],float)):
+        ep_q = qntl_cutoff
+    cq_q = None
+    if isinstance(cuts,str) and cuts == 'quantile':
+        cq_q = np.linspace(0,1,ncuts)
+    return ep_q, cq_q
+
+
+def _cutpoints(lb, ub, ep, cq, cuts='linear', ncuts=10, sig_fig=3):
+    """
+    `cutpoints` from precomputed summaries of the values
+
+    Parameters
+    ----------
+    lb, ub : float
+        minimum and maximum of the values
+
+    ep : numpy 1-D array or None
+        quantiles at the `qntl_cutoff` probabilities, None if no
+        cutoff is applied
+
+    cq : numpy 1-D array or None
+        quantiles at `ncuts` equally spaced probabilities, only
+        used with cuts='quantile'
+
+    Returns
+    -------
+    c_final : numpy 1-D array
+        final cut points
+    """
     # Create lower bound:
-    lb = np.nanmin(x)
     lb_ord_of_mag = _order_of_mag(lb)
     lb_pwr = sig_fig - 1 - lb_ord_of_mag
     lb = np.floor(lb * 10**lb_pwr) / 10**lb_pwr
     # Create upper bound:
-    ub = np.nanmax(x)
     ub_ord_of_mag = _order_of_mag(ub)
     ub_pwr = sig_fig - 1 - ub_ord_of_mag
     ub = np.ceil(ub * 10**ub_pwr) / 10**ub_pwr
 
     # Apply quantile cutoffs if provided:
-    if (qntl_cutoff is not None and
-            len(qntl_cutoff) == 2 and
-            isinstance(qntl_cutoff[0],float) and
-            isinstance(qntl_cutoff[1],float)):
-        ep = np.quantile(x, qntl_cutoff)
-    else:
+    if ep is None:
         ep = np.array([lb,ub])
 
     # Create cut points
@@ -107,7 +234,7 @@ def cutpoints(
                 )
             c = np.sign(c) * c**2
         elif cuts == 'quantile':
-            c = np.quantile(x,np.linspace(0,1,ncuts))
+            c = cq
     else:
         # cuts are the actual cut points themselves
         c = cuts
@@ -115,7 +242,7 @@ def cutpoints(
     # add far endpoints to c:
     c = np.unique(np.append(np.append(lb,c),ub))
     # round/format values in c:
-    c_ord_of_mag = np.array([_order_of_mag(i) for i in c])
+    c_ord_of_mag = _orders_of_mag(c)
     c_log_rnd = np.round(c / 10.0**c_ord_of_mag, sig_fig - 1)
     c_final = np.unique(c_log_rnd * (10.0**c_ord_of_mag))
     return c_final
@@ -125,6 +252,9 @@ def human_readable_num(number, sig_fig=3, **kwargs):
     '''
     Function for making numbers aesthetically-pleasing
 
+    Results are memoized, so formatting the same cutpoints for many
+    columns is cheap.
+
     Parameters
     ----------
     number : float or int
@@ -138,6 +268,12 @@ def human_readable_num(number, sig_fig=3, **kwargs):
     z : str
         number formatted as str
     '''
+    # the memoized helper needs a hashable number
+    return _human_readable_num(float(number), sig_fig)
+
+
+@lru_cache(maxsize=4096)
+def _human_readable_num(number, sig_fig=3):
     if np.isnan(number): z = 'MISSING'
     elif number == 0:
         z = '0'
@@ -147,50 +283,159 @@ def human_readable_num(number, sig_fig=3, **kwargs):
         if magnitude >= -2:
             z = ('%.' + str(sig_fig - 1 - magnitude) + 'f') % (number)
             z = _remove_trailing_zeros(z)
-        else:    
+        else:
             final_num = number / 10**magnitude
-            #z = ('%.' + str(sig_fig - 1) + 'f%s') % (final_num, 'E' + str(magnitude))
             z = ('%.' + str(sig_fig - 1) + 'f') % (final_num)
             z = _remove_trailing_zeros(z) + 'E' + str(magnitude)
     else:
-        units = ['', 'K', 'M', 'G', 'T', 'P']
         k = 1000.0
         magnitude = int(math.floor(math.log(np.abs(number), k)))
         final_num = number / k**magnitude
-        if magnitude > 5:
-            unit = 'E' + str(int(3*magnitude))
-        else:
-            unit = units[magnitude]
-        if np.abs(final_num) < 10:
-            #z = ('%.' + str(sig_fig - 1) + 'f%s') % (final_num, unit)
-            z = ('%.' + str(sig_fig - 1) + 'f') % (final_num)
-            z = _remove_trailing_zeros(z) + unit
-        elif np.abs(final_num) < 100:
-            #z = ('%.' + str(sig_fig-2) + 'f%s') % (final_num, unit)
-            z = ('%.' + str(sig_fig - 2) + 'f') % (final_num)
-            z = _remove_trailing_zeros(z) + unit
-        else:
-            #z = ('%.' + str(sig_fig-3) + 'f%s') % (final_num, unit)
-            z = ('%.' + str(sig_fig - 3) + 'f') % (final_num)
-            z = _remove_trailing_zeros(z) + unit
-
-    #z = _remove_trailing_zeros(z)
+        z = ('%.' + str(_big_precision(final_num, sig_fig)) + 'f') % (final_num)
+        z = _remove_trailing_zeros(z) + _big_unit(magnitude)
     return z
 
 
+def human_readable_nums(x, sig_fig=3):
+    '''
+    Vectorized `human_readable_num`: format an array of numbers with
+    identical results
+
+    Each distinct value is formatted once. Few distinct values go
+    through the memoized `human_readable_num`; otherwise magnitudes
+    are computed for the whole array and values are formatted in one
+    call per precision.
+
+    Parameters
+    ----------
+    x : array-like of numbers
+
+    sig_fig : int
+        Number of significant figures to print
+
+    Returns
+    -------
+    numpy array of str with the shape of `x`
+    '''
+    x = np.asarray(x, dtype=float)
+    if x.size <= 32:
+        return np.array(
+            [_human_readable_num(v, sig_fig) for v in x.ravel().tolist()],
+            dtype=object).reshape(x.shape)
+    uniq, inv = np.unique(x.ravel(), return_inverse=True)
+    if len(uniq) <= 32 or np.isinf(uniq).any():
+        fmt = np.array([_human_readable_num(v, sig_fig) for v in uniq.tolist()], dtype=object)
+    else:
+        fmt = _format_nums(uniq, sig_fig)
+    return fmt[inv.ravel()].reshape(x.shape)
+
+
+_UNITS = ['', 'K', 'M', 'G', 'T', 'P']
+
+
+def _big_unit(magnitude):
+    """Suffix for a number of magnitude 1000**magnitude"""
+    if magnitude > 5:
+        return 'E' + str(int(3*magnitude))
+    return _UNITS[magnitude]
+
+
+def _big_precision(final_num, sig_fig):
+    """Decimals to print for a number scaled to [1, 1000)"""
+    if np.abs(final_num) < 10:
+        return sig_fig - 1
+    elif np.abs(final_num) < 100:
+        return sig_fig - 2
+    return sig_fig - 3
+
+
+def _floor_log(a, log, exact):
+    """
+    floor(log(a)) for an array, agreeing exactly with the scalar
+    function `exact` next to integer results
+    """
+    logs = log(a)
+    res = np.floor(logs).astype(int)
+    near = np.abs(logs - np.round(logs)) < 1e-9
+    res[near] = [exact(i) for i in a[near].tolist()]
+    return res
+
+
+def _format_nums(u, sig_fig=3):
+    """
+    Array version of `_human_readable_num` for finite or NaN values
+
+    Parameters
+    ----------
+    u : numpy 1-D array of floats
+
+    sig_fig : int
+
+    Returns
+    -------
+    numpy 1-D array of str
+    """
+    out = np.full(len(u), 'MISSING', dtype=object)
+    out[u == 0] = '0'
+    a = np.abs(u)
+    idx = np.flatnonzero((a > 0) & ~np.isnan(a))
+    vals = u[idx]
+    prec = np.empty(len(idx), dtype=int)
+    suffix = np.full(len(idx), '', dtype=object)
+
+    small = a[idx] < 1
+    mag = _floor_log(
+        a[idx[small]], np.log10,
+        lambda v: int(np.floor(np.log10(v))))
+    sci = mag < -2
+    prec[small] = np.where(sci, sig_fig - 1, sig_fig - 1 - mag)
+    for m in np.unique(mag[sci]).tolist():
+        sel = np.flatnonzero(small)[sci & (mag == m)]
+        vals[sel] = vals[sel] / 10**m
+        suffix[sel] = 'E' + str(m)
+
+    big = np.flatnonzero(~small)
+    k = 1000.0
+    mag = _floor_log(
+        a[idx[big]], lambda v: np.log(v) / math.log(k),
+        lambda v: int(math.floor(math.log(v, k))))
+    for m in np.unique(mag).tolist():
+        sel = big[mag == m]
+        vals[sel] = vals[sel] / k**m
+        suffix[sel] = _big_unit(m)
+    absval = np.abs(vals[big])
+    prec[big] = np.where(absval < 10, sig_fig - 1,
+                         np.where(absval < 100, sig_fig - 2, sig_fig - 3))
+
+    for p in np.unique(prec).tolist():
+        sel = np.flatnonzero(prec == p)
+        z = np.char.mod('%.' + str(p) + 'f', vals[sel])
+        if p > 0:
+            # remove unnecessary trailing zeros
+            z = np.char.rstrip(np.char.rstrip(z, '0'), '.')
+        out[idx[sel]] = np.char.add(z, suffix[sel].astype(str)).astype(object)
+    return out
+
+
 def cutter(
-    df, x, max_levels=20, point_mass_threshold=0.1,
-    sig_fig=3, fillna="MISSING", **kwargs):
+    df, x=None, max_levels=20, point_mass_threshold=0.1,
+    sig_fig=3, fillna="MISSING", weights=None,
+    block_size=_BLOCK_SIZE, **kwargs):
     """
     Cut a numeric variable into bins
 
     Parameters
     ----------
-    df : pandas.DataFrame
+    df : pandas.DataFrame or numpy 1-D array
+        data with the variable 'x', or the numeric values themselves.
+        A numpy.memmap (e.g. from `numpy.load(..., mmap_mode='r')`) is
+        never loaded in full: it is read `block_size` values at a time,
+        once to summarize it in a NumericSketch and once to assign bins,
+        so quantile-based cutpoints are within the sketch's rank error
 
     x : str
         the name of the numeric variable in 'df' to construct
-        bins from
+        bins from. None if 'df' holds the values
 
     max_levels : int
         maximum number of bins to create from 'x'
@@ -205,72 +450,46 @@ def cutter(
     fillna : str
         Value to fill NAs with
 
+    weights : str or 1-D array-like
+        optional column of 'df', or array, with the weight (e.g. count)
+        of each row. Bins are then built as if each row was repeated
+        that many times, e.g. from `(value, count)` aggregates
+
+    block_size : int
+        number of values of a numpy.memmap read at a time
+
     Returns
     -------
     z : pandas.Series
         Categorical series of binned values
     """
-
-    df = df.loc[:,[x]].copy()
-
-    # pm contains any values that exceed point_mass_threshold
-    # pm is 1-D numpy.array
-    pm = _point_mass(df[x], threshold = point_mass_threshold)
-
-    if len(pm) == 0:
-        # if there are no values exceeding point_mass_threshold
-        # proceed as usual
-        x_no_nan = ~np.isnan(df.loc[:,x].values)
-        cps = cutpoints(
-            df.loc[x_no_nan,x].values,
-            ncuts = max_levels,
-            **kwargs)
-
-    elif len(pm) > 0:
-        # if there are values exceeding point_mass_threshold
-        # put all remaining values in rem
-        rem = df.loc[~df[x].isin(pm),[x]]
-        x_no_nan = ~np.isnan(rem.loc[:,x].values)
-        if len(rem.loc[x_no_nan,x].values) > 0:
-            # apply cutpoints to rem if there are non-NaN
-            # values
-            cps = cutpoints(
-                rem.loc[x_no_nan,x].values,
-                ncuts = max_levels, # - len(pm),
-                **kwargs)
-        else:
-            # Otherwise, rem has no non-NaN values and
-            # we just generate empty cutpoints
-            cps = np.array([])
-
-    # Construct bin_labels and pm_labels
-    c_final, bin_labels, pm_labels = _finalize_bins(cps,pm,sig_fig=sig_fig)
-
-    # Bin values
-    df.loc[~df[x].isin(pm),x + '_BINNED'] = pd.cut(
-        df.loc[~df[x].isin(pm),x].values,
-        c_final,
-        labels=bin_labels,
-        include_lowest=True).astype(str)
-
-    # try to fix issue with pandas.cut
-    eps = 10e-6
-    df.loc[lambda df: (df[x] >= c_final[0] - eps) & (df[x] <= c_final[0] + eps), x + "_BINNED"] = bin_labels[0]
-
-    # Bring in point masses
-    for i,v in enumerate(pm):
-        df.loc[df[x] == v,x + '_BINNED'] = pm_labels[i]
-
-    # Construct final labels
-    final_labels = bin_labels+pm_labels
-    final_labels.sort()
-
-    # Apply labels
-    z = (pd.Categorical(
-        df.loc[:,x + '_BINNED'].values,
-        categories = final_labels)
-        .add_categories(fillna)
-        .fillna(fillna))
+    values = df if x is None else df[x]
+    if isinstance(values, np.memmap):
+        if weights is not None:
+            raise ValueError("`weights` cannot be used with a numpy.memmap")
+        fit_on = NumericSketch(_SKETCH_SIZE)
+        for block in _blocks(values, block_size):
+            fit_on.update(block)
+    else:
+        values = np.asarray(values)
+        fit_on = values
+
+    c_final, pm, bin_labels, pm_labels = _fit_bins(
+        fit_on, max_levels=max_levels,
+        point_mass_threshold=point_mass_threshold,
+        sig_fig=sig_fig, weights=_weights(df, weights), **kwargs)
+
+    # Bin values in one sorted search, then attach the labels
+    labels, order = _label_order(bin_labels, pm_labels)
+    if isinstance(values, np.memmap):
+        codes = np.empty(len(values), dtype=np.min_scalar_type(-len(order) - 1))
+        for start, block in zip(range(0, len(values), block_size),
+                                _blocks(values, block_size)):
+            codes[start:start + len(block)] = _bin_codes(block, c_final, pm, order)
+    else:
+        codes = _bin_codes(values, c_final, pm, order)
+    codes[codes < 0] = len(labels)
+    z = pd.Categorical.from_codes(codes, labels + [fillna])
     return z
 
 
@@ -303,13 +522,185 @@ def binner_df(
     """
     if new_col is None:
         new_col = x
-    df_ = df.copy().assign(
-        **{new_col: lambda z: cutter(z, x, max_levels, **kwargs)})
     if fill_nan is not None:
-        df_.replace({new_col: {np.nan: fill_nan}}, inplace=True)
+        kwargs.setdefault('fillna', fill_nan)
+    df_ = df.copy(deep=False)
+    df_[new_col] = cutter(df, x, max_levels, **kwargs)
     return df_
 
 
+def bin_frame(
+    df, columns=None, max_levels=20, point_mass_threshold=0.1,
+    sig_fig=3, fillna="MISSING", suffix=None, n_jobs=1,
+    block_size=32, **kwargs):
+    """
+    Bin several numeric variables at once, with the same bins as
+    `cutter` applied to each of them
+
+    Columns are processed `block_size` at a time: each block is sorted
+    once, point masses are read off the sorted columns, and the
+    quantiles and extremes of all columns with the same number of
+    remaining values come from a single 2-D `numpy.quantile` call.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+
+    columns : None, str or list
+        the numeric variables to bin. If None, all numeric columns
+
+    max_levels : int
+        maximum number of bins to create per variable
+
+    point_mass_threshold : float
+        Levels with frequency greater than point_mass_threshold
+        get their own bin
+
+    sig_fig : int
+        Significant figures to use in binning
+
+    fillna : str
+        Value to fill NAs with
+
+    suffix : str
+        if given, binned columns are added as `column + suffix`,
+        otherwise they replace the original columns
+
+    n_jobs : int
+        number of worker processes binning blocks of columns.
+        -1 uses all processors
+
+    block_size : int
+        number of columns converted and sorted together, bounding the
+        extra memory to `block_size` float columns per worker
+
+    **kwargs : 'qntl_cutoff' and 'cuts', passed to `cutpoints`
+
+    Returns
+    -------
+    pandas.DataFrame
+        `df` with the binned columns. The other columns are not copied
+    """
+    unknown = sorted(set(kwargs) - {'qntl_cutoff', 'cuts'})
+    if unknown:
+        raise TypeError(f"bin_frame() got unexpected keyword arguments: {', '.join(unknown)}")
+    if n_jobs == 0 or n_jobs < -1:
+        raise ValueError("n_jobs must be a positive integer or -1")
+    if columns is None:
+        columns = df.select_dtypes(include=np.number).columns.tolist()
+    elif isinstance(columns, (str, int)):
+        columns = [columns]
+    else:
+        columns = list(columns)
+    blocks = [columns[i:i + block_size] for i in range(0, len(columns), block_size)]
+    arrays = (df[b].to_numpy(dtype=float) for b in blocks)
+    bin_block = partial(
+        _bin_block, max_levels=max_levels,
+        point_mass_threshold=point_mass_threshold,
+        sig_fig=sig_fig, fillna=fillna, **kwargs)
+
+    if n_jobs == 1 or len(blocks) < 2:
+        results = list(map(bin_block, arrays))
+    else:
+        n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(blocks))) as ex:
+            results = list(ex.map(bin_block, arrays))
+
+    binned = pd.DataFrame(
+        dict(zip(columns, (z for r in results for z in r))), index=df.index)
+    if suffix is not None:
+        return pd.concat([df, binned.add_suffix(suffix)], axis=1)
+    df_ = df.copy(deep=False)
+    df_[columns] = binned
+    return df_
+
+
+def _bin_block(arr, max_levels=20, point_mass_threshold=0.1,
+               sig_fig=3, fillna="MISSING", **kwargs):
+    """
+    Bin every column of a 2-D float array as `cutter` would
+
+    Returns
+    -------
+    list of pandas.Categorical, one per column
+    """
+    qntl_cutoff = kwargs.get('qntl_cutoff', [0.025, 0.975])
+    cuts = kwargs.get('cuts', 'linear')
+    ep_q, cq_q = _quantile_probs(qntl_cutoff, cuts, max_levels)
+    probs = [p for p in (ep_q, cq_q) if p is not None]
+    probs = np.concatenate(probs) if probs else np.array([])
+
+    # NaNs sort last, so the first n_valid values of each column are
+    # its non-missing values in order
+    s = np.sort(arr, axis=0)
+    n_valid = (~np.isnan(arr)).sum(axis=0)
+
+    pms = []
+    cps = [np.array([])] * arr.shape[1]
+    same_n = {}
+    for j in range(arr.shape[1]):
+        values = s[:n_valid[j], j]
+        pm = _sorted_point_mass(values, point_mass_threshold)
+        pms.append(pm)
+        if len(pm) > 0:
+            values = values[~np.isin(values, pm)]
+            if len(values) > 0:
+                cps[j] = _block_cutpoints(
+                    values[:, None], probs, ep_q, cq_q, cuts, max_levels)[0]
+        elif len(values) > 0:
+            same_n.setdefault(len(values), []).append(j)
+    for n, cols in same_n.items():
+        for j, c in zip(cols, _block_cutpoints(
+                s[:n, cols], probs, ep_q, cq_q, cuts, max_levels)):
+            cps[j] = c
+
+    res = []
+    for j in range(arr.shape[1]):
+        c_final, bin_labels, pm_labels = _finalize_bins(cps[j], pms[j], sig_fig=sig_fig)
+        labels, order = _label_order(bin_labels, pm_labels)
+        codes = _bin_codes(arr[:, j], c_final, pms[j], order)
+        codes[codes < 0] = len(labels)
+        res.append(pd.Categorical.from_codes(codes, labels + [fillna]))
+    return res
+
+
+def _block_cutpoints(s, probs, ep_q, cq_q, cuts, ncuts):
+    """
+    `cutpoints` of every column of a sorted 2-D array without missing
+    values, with the quantiles of all columns computed together. As in
+    `cutter`, they are rounded with the default `sig_fig`, which only
+    changes the labels
+    """
+    q = np.quantile(s, probs, axis=0) if len(probs) > 0 else None
+    n_ep = 0 if ep_q is None else len(ep_q)
+    res = []
+    for j in range(s.shape[1]):
+        ep = q[:n_ep, j] if ep_q is not None else None
+        cq = q[n_ep:, j] if cq_q is not None else None
+        res.append(_cutpoints(s[0, j], s[-1, j], ep, cq, cuts=cuts, ncuts=ncuts))
+    return res
+
+
+def _weights(df, weights):
+    """
+    Weights given as a column name of 'df' or as an array-like
+    """
+    if weights is None:
+        return None
+    if isinstance(weights, str):
+        weights = df[weights]
+    return np.asarray(weights, dtype=float)
+
+
+def _blocks(x, block_size=_BLOCK_SIZE):
+    """
+    Consecutive slices of a 1-D array, so that a numpy.memmap is only
+    read from disk `block_size` values at a time
+    """
+    for start in range(0, len(x), block_size):
+        yield x[start:start + block_size]
+
+
 def _log_spcl(x):
     """
     Log special returns the base 10 log of the absolute value of x for
@@ -352,7 +743,32 @@ def _order_of_mag(x):
     return ord_of_mag
 
 
-def _point_mass(x, threshold=0.1):
+def _orders_of_mag(x):
+    """
+    Vectorized `_order_of_mag`
+
+    Parameters
+    ----------
+
+    x : numpy 1-D array
+
+    Returns
+    -------
+
+    numpy 1-D array of int : order of magnitude of each element of x
+    """
+    x = np.asarray(x, dtype=float)
+    with np.errstate(divide='ignore'):
+        logs = np.where(x == 0, 0.0, np.log(np.abs(x)) / math.log(10))
+    ord_of_mag = np.floor(logs).astype(int)
+    # Values next to a power of 10 are recomputed exactly as
+    # `_order_of_mag` would, so both always agree
+    near = np.abs(logs - np.round(logs)) < 1e-9
+    ord_of_mag[near] = [_order_of_mag(i) for i in x[near]]
+    return ord_of_mag
+
+
+def _point_mass(x, threshold=0.1, weights=None):
     """
     Find point masses in pandas.Series with frequency exceeding
     specified value
@@ -366,15 +782,62 @@ def _point_mass(x, threshold=0.1):
         If value frequency exceeds threshold, consider value to have
         point mass
 
+    weights : numpy 1-D array
+        optional weight of each element of x. Frequencies are then
+        the share of the total weight of the non-missing values
+
     Returns
     -------
 
     1-D numpy array that contains the point masses
     """
-    cnts = x.value_counts(normalize=True)
-    v = cnts[cnts > threshold].index.values
-    v.sort()
-    return v
+    if weights is not None:
+        w = pd.Series(np.asarray(weights, dtype=float), index=pd.Index(np.asarray(x)))
+        w = w[w.index.notna()]
+        totals = w.groupby(level=0).sum()
+        v = totals[totals / w.sum() > threshold].index.values
+        v.sort()
+        return v
+
+    values = np.asarray(x)
+    if values.dtype.kind not in 'biuf':
+        cnts = pd.Series(x).value_counts(normalize=True)
+        v = cnts[cnts > threshold].index.values
+        v.sort()
+        return v
+
+    # Sort-based detection: after sorting, a value whose run is at least
+    # k + 1 long equals the value k positions further on
+    if values.dtype.kind == 'f':
+        values = values[~np.isnan(values)]
+    return _sorted_point_mass(np.sort(values), threshold)
+
+
+def _sorted_point_mass(values, threshold=0.1):
+    """
+    `_point_mass` of sorted, non-missing numeric values
+
+    Parameters
+    ----------
+
+    values : sorted 1-D numpy array
+
+    threshold : float
+
+    Returns
+    -------
+
+    1-D numpy array that contains the point masses
+    """
+    n = len(values)
+    k = int(np.floor(threshold * n)) - 1
+    if k > 0:
+        candidates = np.unique(values[:n - k][values[:n - k] == values[k:]])
+        counts = np.searchsorted(values, candidates, side='right') - \
+            np.searchsorted(values, candidates, side='left')
+    else:
+        candidates, counts = np.unique(values, return_counts=True)
+    return candidates[counts / n > threshold]
 
 
 def _remove_trailing_zeros(num_as_str):
@@ -392,9 +855,8 @@ def _remove_trailing_zeros(num_as_str):
 
     Number as str with unnecessary trailing zeros removed
     """
-    if re.search("\\.", num_as_str):
-        num_as_str = re.sub("0*$", "", num_as_str)
-        num_as_str = re.sub("\\.$", "", num_as_str)
+    if '.' in num_as_str:
+        num_as_str = num_as_str.rstrip('0').rstrip('.')
     return num_as_str
 
 
@@ -419,19 +881,22 @@ def _remove_closest(x, y, exclude_endpoints=True, **kwargs):
         removing the values closest
         to the elements of y
     """
-    x = x.copy()
-    if len(x) > 2 or not exclude_endpoints:
-        if exclude_endpoints:
-            z = x[1:-1]
-        else:
-            z = x
-        r = range(len(z))
-        ridx = [min(r, key=lambda i: abs(z[i] - j)) + 1 for j in y]
-        ridx = list(set(ridx))
-        x = x.tolist()
-        for index in sorted(ridx, reverse=True):
-            del x[index]
-        x = np.array(x)
+    x = np.asarray(x).copy()
+    y = np.asarray(y)
+    if (len(x) > 2 or not exclude_endpoints) and len(y) > 0 and len(x) > 0:
+        offset = 1 if exclude_endpoints else 0
+        z = x[offset:len(x) - offset]
+        # nearest element of z to each element of y: the neighbours
+        # found by a sorted search, ties going to the lower index
+        srt = np.argsort(z, kind='stable')
+        zs = z[srt]
+        hi = np.clip(np.searchsorted(zs, y), 0, len(zs) - 1)
+        lo = np.clip(hi - 1, 0, len(zs) - 1)
+        d_lo = np.abs(zs[lo] - y)
+        d_hi = np.abs(zs[hi] - y)
+        take_lo = (d_lo < d_hi) | ((d_lo == d_hi) & (srt[lo] < srt[hi]))
+        ridx = np.unique(np.where(take_lo, srt[lo], srt[hi])) + offset
+        x = np.delete(x, ridx)
     return x
 
 
@@ -496,20 +961,186 @@ def _label_constructor(x, pm, sig_fig=3, **kwargs):
     """
     bin_labels = []
     pm_labels = []
-    x_format = [human_readable_num(i, sig_fig=sig_fig) for i in x]
+    x_format = human_readable_nums(x, sig_fig=sig_fig).tolist()
+    is_pm = np.isin(x, pm).tolist()
     cntr = 0
     for i in range(len(x)):
-        if x[i] in pm:
+        if is_pm[i]:
             pm_labels.append(str(i+cntr+1).zfill(2) + ": " + x_format[i])
             cntr += 1
         if i < len(x) - 1:
             bin_labels.append(
                 str(i + cntr + 1).zfill(2) +
                 ': ' +
-                ('[' if i == 0 and (x[i] not in pm) else '(') +
+                ('[' if i == 0 and not is_pm[i] else '(') +
                 x_format[i] +
                 ', ' +
                 x_format[i+1] +
-                (']' if (x[i+1] not in pm) else ')')
+                (']' if not is_pm[i+1] else ')')
             )
     return bin_labels, pm_labels
+
+
+def _fit_bins(x, max_levels=20, point_mass_threshold=0.1, sig_fig=3,
+              weights=None, **kwargs):
+    """
+    Compute the bins `cutter` uses for a numeric variable
+
+    Parameters
+    ----------
+    x : pandas.Series or NumericSketch
+        numeric values, or a NumericSketch summarizing them
+
+    max_levels : int
+        maximum number of bins to create from 'x'
+
+    point_mass_threshold : float
+        Levels of 'x' with frequency greater than point_mass_threshold
+        get their own bin
+
+    sig_fig : int
+        Significant figures to use in the bin labels
+
+    weights : numpy 1-D array
+        optional weight of each value
+
+    **kwargs : passed to `cutpoints`
+
+    Returns
+    -------
+    c_final : numpy.array
+        1-D array of finalized bin endpoints
+
+    pm : numpy.array
+        1-D array of values with point masses
+
+    bin_labels : list
+        Final bin labels
+
+    pm_labels : list
+        Final point mass labels
+    """
+    # pm contains any values that exceed point_mass_threshold
+    # pm is 1-D numpy.array
+    if isinstance(x, NumericSketch):
+        if weights is not None:
+            raise ValueError("`weights` cannot be used with a NumericSketch")
+        pm = x.point_mass(threshold = point_mass_threshold)
+        values = x.quantiles.without(pm)
+        n_values = values.n
+    elif weights is not None:
+        pm = _point_mass(x, threshold = point_mass_threshold, weights = weights)
+        values, weights = _drop_missing(x, weights)
+        if len(pm) > 0:
+            rem = ~np.isin(values, pm)
+            values, weights = values[rem], weights[rem]
+        n_values = len(values)
+    else:
+        pm = _point_mass(x, threshold = point_mass_threshold)
+        values = np.asarray(x, dtype=float)
+        if len(pm) > 0:
+            # if there are values exceeding point_mass_threshold
+            # put all remaining values in rem
+            values = values[~np.isin(values, pm)]
+        values = values[~np.isnan(values)]
+        n_values = len(values)
+
+    if n_values > 0:
+        cps = cutpoints(values, ncuts = max_levels, weights = weights, **kwargs)
+    else:
+        # Otherwise, there are no non-NaN values left and
+        # we just generate empty cutpoints
+        cps = np.array([])
+
+    # Construct bin_labels and pm_labels
+    c_final, bin_labels, pm_labels = _finalize_bins(cps, pm, sig_fig=sig_fig)
+    return c_final, pm, bin_labels, pm_labels
+
+
+def _label_order(bin_labels, pm_labels):
+    """
+    Sorted bin labels, as used for the categories returned by `cutter`,
+    and the position of each bin within them
+
+    Parameters
+    ----------
+    bin_labels : list
+
+    pm_labels : list
+
+    Returns
+    -------
+    labels : list
+        sorted labels
+
+    order : numpy.array
+        position in `labels` of each element of bin_labels + pm_labels
+    """
+    raw = bin_labels + pm_labels
+    labels = sorted(raw)
+    pos = {l: i for i, l in enumerate(labels)}
+    return labels, np.array([pos[l] for l in raw], dtype=np.intp)
+
+
+def _bin_codes(x, c_final, pm, order=None):
+    """
+    Assign numeric values to the bins from `_fit_bins` with a single
+    sorted search over the bin endpoints
+
+    Parameters
+    ----------
+    x : 1-D array-like
+        numeric values
+
+    c_final : numpy.array
+        1-D array of finalized bin endpoints
+
+    pm : numpy.array
+        1-D array of values with point masses
+
+    order : numpy.array
+        optional map from the codes described below to label positions,
+        as returned by `_label_order`
+
+    Returns
+    -------
+    codes : numpy.array
+        values in (c_final[i], c_final[i+1]] (the first bin is also closed
+        on the left) get code i, values equal to pm[j] get code
+        len(c_final) - 1 + j and missing or out of range values get -1
+    """
+    x = np.asarray(x, dtype=float)
+    n_edges = len(c_final)
+    n_bins = max(n_edges - 1, 0)
+    if order is None:
+        order = np.arange(n_bins + len(pm))
+    # position -1 maps missing and out of range values to -1
+    order = np.append(order, -1).astype(np.min_scalar_type(-len(order) - 1))
+
+    # Search position i + 1 means bin i; positions 0 and n_edges (which
+    # also holds NaN) are outside the endpoints
+    idx = np.searchsorted(c_final, x, side='left')
+    table = np.full(n_edges + 1, -1, dtype=np.intp)
+    table[1:n_edges] = np.arange(n_bins)
+    codes = order[table][idx]
+
+    if n_bins > 0:
+        # same tolerance as the fix for pandas.cut in `cutter`
+        eps = 10e-6
+        if c_final[1] > c_final[0] + eps:
+            # only values at or below the lowest endpoint can change
+            low = np.flatnonzero(idx == 0)
+            low = low[x[low] >= c_final[0] - eps]
+        else:
+            low = np.flatnonzero((x >= c_final[0] - eps) & (x <= c_final[0] + eps))
+        codes[low] = order[0]
+
+    if len(pm) > 0:
+        # point masses are endpoints, so they are found by the same search
+        is_pm = np.append(np.isin(c_final, pm), False)
+        edge_pm = np.full(n_edges + 1, -1, dtype=np.intp)
+        edge_pm[is_pm] = n_bins + np.searchsorted(pm, c_final[is_pm[:-1]])
+        cand = np.flatnonzero(is_pm[idx])
+        cand = cand[x[cand] == c_final[idx[cand]]]
+        codes[cand] = order[edge_pm[idx[cand]]]
+    return codes
@@ -0,0 +1,197 @@
+"""
+Opt-in cache of histogram and heatmap aggregates, keyed by a
+fingerprint of the input columns and the computation parameters
+"""
+
+import os
+import copy
+import pickle
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# plotting arguments that do not change the aggregates
+_PLOT_KWARGS = ('fig', 'ax', 'xlabel', 'ylabel', 'normalize')
+
+_CACHE = None
+_MISSING = object()
+
+
+class AggregateCache:
+    """
+    Two-tier cache of computed aggregates: a least recently used
+    in-memory tier holding `maxsize` entries and, if `path` is given,
+    an on-disk tier of pickle files that outlives the process
+
+    Values are copied on the way in and out, so callers can modify
+    what they get back without corrupting the cache.
+
+    Parameters
+    ----------
+    maxsize : int
+        number of entries kept in memory
+
+    path : str
+        optional directory of the on-disk tier, created if needed
+
+    Attributes
+    ----------
+    hits, misses : int
+    """
+    def __init__(self, maxsize=128, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.pkl')
+
+    def get(self, key, default=None):
+        """Cached value of `key`, or `default`"""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(self._memory[key])
+        if self.path is not None and os.path.exists(self._file(key)):
+            with open(self._file(key), 'rb') as f:
+                value = pickle.load(f)
+            self._remember(key, value)
+            self.hits += 1
+            return copy.deepcopy(value)
+        self.misses += 1
+        return default
+
+    def set(self, key, value):
+        """Store `value` under `key` in both tiers"""
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        if self.path is not None:
+            # write then rename, so readers never see a partial file
+            tmp = self._file(key) + f'.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._file(key))
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def clear(self, disk=False):
+        """Empty the in-memory tier and, if `disk`, the on-disk tier"""
+        self._memory.clear()
+        if disk and self.path is not None:
+            for file in os.listdir(self.path):
+                if file.endswith('.pkl'):
+                    os.remove(os.path.join(self.path, file))
+
+    def __len__(self):
+        return len(self._memory)
+
+    def __repr__(self):
+        return (f"AggregateCache(maxsize={self.maxsize}, path={self.path!r}, "
+                f"entries={len(self)}, hits={self.hits}, misses={self.misses})")
+
+
+def enable_cache(maxsize=128, path=None):
+    """
+    Cache the aggregates of `numeric_histogram`, `categorical_histogram`
+    and `categorical_heatmap` from now on
+
+    Parameters
+    ----------
+    maxsize : int
+        number of aggregates kept in memory
+
+    path : str
+        optional directory where aggregates are also stored on disk
+
+    Returns
+    -------
+    AggregateCache
+    """
+    global _CACHE # pylint: disable=global-statement
+    _CACHE = AggregateCache(maxsize=maxsize, path=path)
+    return _CACHE
+
+
+def disable_cache():
+    """Stop caching aggregates and drop the in-memory tier"""
+    global _CACHE # pylint: disable=global-statement
+    _CACHE = None
+
+
+def get_cache():
+    """The active AggregateCache, or None if caching is disabled"""
+    return _CACHE
+
+
+def _token(value):
+    """Stable representation of a parameter value for the fingerprint"""
+    if isinstance(value, (pd.Series, pd.Index)):
+        value = value.to_numpy()
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'O':
+            value = pd.util.hash_array(value)
+        return f"{value.dtype}{value.shape}" + hashlib.blake2b(
+            np.ascontiguousarray(value).tobytes(), digest_size=16).hexdigest()
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join(_token(v) for v in value) + ']'
+    return repr(value)
+
+
+def fingerprint(df, columns, **params):
+    """
+    Hash of the values and dtypes of `columns` of 'df' and of the
+    parameters, ignoring the index and plotting arguments
+
+    Returns
+    -------
+    str
+    """
+    h = hashlib.blake2b(digest_size=20)
+    for col in columns:
+        x = df[col]
+        h.update(f"{col!r}:{x.dtype}:{len(x)};".encode())
+        h.update(pd.util.hash_pandas_object(x, index=False).to_numpy().tobytes())
+    for k in sorted(params):
+        if k not in _PLOT_KWARGS:
+            h.update(f"{k}={_token(params[k])};".encode())
+    return h.hexdigest()
+
+
+def cached(name, df, columns, params, compute):
+    """
+    `compute()`, looked up in and stored to the active cache if any
+
+    Parameters
+    ----------
+    name : str
+        name of the computation
+
+    df : pandas.DataFrame
+
+    columns : list
+        columns of 'df' the computation reads
+
+    params : dict
+        every other argument the result depends on
+
+    compute : callable without arguments
+    """
+    cache = _CACHE
+    if cache is None:
+        return compute()
+    key = fingerprint(df, columns, _name=name, **params)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        cache.set(key, value)
+    return value
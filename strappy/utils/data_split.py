@@ -1,43 +1,341 @@
+import os
 import pandas as pd
 import numpy as np
 from typing import Union
 
+from ._compat import factorize_keep_na
+
+SPLITS = ['TRAIN', 'TEST', 'VAL', 'OOT']
+_OOT = 3
+
+
+def _key_hashes(values) -> np.ndarray:
+    """
+    Hash of each key, the same whatever dtype the key was read as.
+    Integral numbers and integer strings hash as int64, so 1, 1.0 and
+    '1' are alike, other values by their text
+    """
+    values = np.asarray(values)
+    kind = values.dtype.kind
+    if kind in 'iu':
+        return pd.util.hash_array(values.astype(np.int64))
+    if kind in 'Mm':
+        return pd.util.hash_array(values)
+    h = np.empty(len(values), dtype=np.uint64)
+    if kind == 'f':
+        ints = np.isfinite(values) & (values == np.round(values)) \
+            & (np.abs(values) < 2.0**63)
+        h[ints] = pd.util.hash_array(values[ints].astype(np.int64))
+        h[~ints] = pd.util.hash_array(values[~ints].astype(str).astype(object))
+        return h
+    # text and mixed objects: each distinct value is looked at once
+    codes, uniques = factorize_keep_na(values)
+    uniques = np.asarray(uniques, dtype=object)
+    numeric = np.array([
+        isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool)
+        for v in uniques], dtype=bool)
+    hu = np.empty(len(uniques), dtype=np.uint64)
+    if numeric.any():
+        hu[numeric] = _key_hashes(np.array(uniques[numeric].tolist()))
+    text = pd.Series([str(v) for v in uniques[~numeric]], dtype=object)
+    ints = text.str.fullmatch(r'-?(0|[1-9][0-9]{0,17})').to_numpy(dtype=bool)
+    th = np.empty(len(text), dtype=np.uint64)
+    th[ints] = pd.util.hash_array(text[ints].astype(np.int64).to_numpy())
+    th[~ints] = pd.util.hash_array(text[~ints].to_numpy())
+    hu[~numeric] = th
+    return hu[codes]
+
+
+def _hash_unit(values, seed:int=42) -> np.ndarray:
+    """
+    Deterministic uniform [0, 1) draw for each value, from a hash of the
+    value that is the same across runs, machines and refreshes of data,
+    and whether the value is read as an integer, a float or a string
+    """
+    h = _key_hashes(values)
+    # mix in the seed with the splitmix64 finalizer
+    with np.errstate(over='ignore'):
+        h = h + np.uint64(seed % 2**64) * np.uint64(0x9E3779B97F4A7C15)
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        h = h ^ (h >> np.uint64(31))
+    return (h >> np.uint64(11)) * 2.0**-53
+
+
+def _split_codes(u:np.ndarray, train_size:float, test_size:float) -> np.ndarray:
+    """Index in SPLITS of the split of each uniform draw 'u'"""
+    return np.searchsorted(
+        np.array([train_size, train_size + test_size]), u, side='right').astype(np.int8)
+
+
+def _oot_mask(df:pd.DataFrame, oot_dt_col:Union[str,None], oot_dt) -> np.ndarray:
+    """Rows dated on or after 'oot_dt', which are out of time"""
+    if not oot_dt_col:
+        return np.zeros(len(df), dtype=bool)
+    return (pd.to_datetime(df[oot_dt_col]) >= pd.to_datetime(oot_dt)).to_numpy()
+
+
 def data_split(df:pd.DataFrame, train_size:float=0.8, test_size:float=0.1,
     strat_col:Union[str,None]=None, oot_dt_col:Union[str,None]=None,
-    oot_dt:Union[str,None]=None, split_col="SPLIT"):
+    oot_dt:Union[str,None]=None, split_col="SPLIT", method:str="shuffle",
+    seed:int=42, categorical:bool=False):
+    """
+    Assign each row of 'df' to a TRAIN, TEST or VAL split, or to OOT if
+    its 'oot_dt_col' is on or after 'oot_dt'
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+
+    train_size, test_size : float
+        shares of the rows, or of the values of 'strat_col', in TRAIN and
+        TEST. The rest are in VAL
 
-    df = df.copy()
-    df.loc[:,split_col] = None
-    if oot_dt_col:
-        df.loc[
-            pd.to_datetime(df[oot_dt_col]) >= pd.to_datetime(oot_dt),
-            split_col] = 'OOT'
+    strat_col : str
+        optional column whose values are kept within a single split.
+        Rows with a missing value are not assigned a split
 
+    oot_dt_col : str
+        optional date column for the out of time split
+
+    oot_dt : date-like
+        first date of the out of time split
+
+    split_col : str
+        name of the column holding the split
+
+    method : str
+        'shuffle' to shuffle the rows or values with 'seed' and split
+        them by 'train_size' and 'test_size', or 'hash' to split each
+        value of 'strat_col' (or of the index) by a hash of it, so the
+        split of a value never changes
+
+    seed : int
+        seed of the shuffle, or key of the hash
+
+    categorical : bool
+        if True, 'split_col' is categorical rather than object
+
+    Returns
+    -------
+    pandas.DataFrame
+        'df' with the column 'split_col'. The other columns are not copied
+    """
+    if method not in ('shuffle', 'hash'):
+        raise ValueError("method must be 'shuffle' or 'hash'")
+    oot = _oot_mask(df, oot_dt_col, oot_dt)
+    free = np.flatnonzero(~oot)
+    codes = np.full(len(df), -1, dtype=np.int8)
+    codes[oot] = _OOT
+
+    key = None
     if strat_col:
-        v = df.loc[lambda x: x[split_col].isnull(),strat_col].unique()
+        key = df[strat_col].to_numpy()[free]
+    elif method == 'hash':
+        key = df.index.to_numpy()[free]
+
+    if method == 'hash':
+        codes[free] = _split_codes(_hash_unit(key, seed), train_size, test_size)
+        if strat_col:
+            codes[free[pd.isna(key)]] = -1
+    else:
+        if strat_col:
+            # the values of strat_col in order of appearance, as unique() gives them
+            groups, v = factorize_keep_na(key)
+        else:
+            v = free
+        # the same shuffle as np.random.shuffle(v) after np.random.seed(seed)
+        order = np.arange(len(v))
+        np.random.RandomState(seed).shuffle(order)
+        n_train = int(train_size*len(v))
+        n_test = int((train_size+test_size)*len(v)) - n_train
+        split = np.repeat(
+            np.arange(3, dtype=np.int8), [n_train, n_test, len(v) - n_train - n_test])
+        if strat_col:
+            split_of = np.empty_like(split)
+            split_of[order] = split
+            split_of[pd.isna(v)] = -1
+            codes[free] = split_of[groups]
+        else:
+            codes[v[order]] = split
+
+    out = df.copy(deep=False)
+    if categorical:
+        out[split_col] = pd.Categorical.from_codes(codes, SPLITS)
     else:
-        v = np.array([i for i,j in enumerate(df[split_col].isnull()) if j])
-    
-    np.random.seed(42)
-    np.random.shuffle(v)
-    train_v = np.array(v[:int(train_size*len(v))])
-    test_v = np.array(v[int(train_size*len(v)):int((train_size+test_size)*len(v))])
-    val_v = np.array(v[int((train_size+test_size)*len(v)):])
+        out[split_col] = np.array(SPLITS + [None], dtype=object)[codes]
+    return out
+
+
+def group_kfold(df:pd.DataFrame, n_splits:int=5, strat_col:Union[str,None]=None,
+    oot_dt_col:Union[str,None]=None, oot_dt:Union[str,None]=None,
+    seed:Union[int,None]=42):
+    """
+    Generate train and validation row positions for k-fold cross
+    validation, keeping each value of 'strat_col' within one fold
 
+    Only the fold of each row is held in memory, and each fold's
+    positions are built when it is requested, so the frame is never
+    copied. Rows in the out of time split, or with a missing
+    'strat_col' value, are in no fold.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+
+    n_splits : int
+        number of folds
+
+    strat_col : str
+        optional column whose values are kept within a single fold. By
+        default, rows are assigned to folds individually
+
+    oot_dt_col, oot_dt :
+        as for `data_split`, rows dated on or after 'oot_dt' are left out
+
+    seed : int
+        seed of the np.random.Generator shuffling the groups
+
+    Yields
+    ------
+    train, validation : numpy 1D arrays of int
+        positions of the rows, for use with df.iloc
+    """
+    free = np.flatnonzero(~_oot_mask(df, oot_dt_col, oot_dt))
     if strat_col:
-        df.loc[lambda x: x.apply(
-            lambda x: pd.isnull(x[split_col]) and x[strat_col] in train_v, axis=1),
-            split_col] = "TRAIN"
-        df.loc[lambda x: x.apply(
-            lambda x: pd.isnull(x[split_col]) and x[strat_col] in test_v, axis=1),
-            split_col] = "TEST"
-        df.loc[lambda x: x.apply(
-            lambda x: pd.isnull(x[split_col]) and x[strat_col] in val_v, axis=1),
-            split_col] = "VAL"
+        groups, uniques = pd.factorize(df[strat_col].to_numpy()[free])
+        free, groups = free[groups >= 0], groups[groups >= 0]
+        n_groups = len(uniques)
     else:
-        df.iloc[train_v,lambda df: df.columns == split_col] = "TRAIN"
-        df.iloc[test_v,lambda df: df.columns == split_col] = "TEST"
-        df.iloc[val_v,lambda df: df.columns == split_col] = "VAL"
+        groups, n_groups = None, len(free)
+    if n_groups < n_splits:
+        raise ValueError(
+            f"cannot make {n_splits} folds from {n_groups} groups")
+
+    # groups in a random order, cut into n_splits folds of the same size
+    fold_of = np.empty(n_groups, dtype=np.min_scalar_type(n_splits))
+    fold_of[np.random.default_rng(seed).permutation(n_groups)] = \
+        np.arange(n_groups) * n_splits // n_groups
+    folds = fold_of if groups is None else fold_of[groups]
+
+    for k in range(n_splits):
+        in_fold = folds == k
+        yield free[~in_fold], free[in_fold]
+
+
+def _read_chunks(source:str, file_format:str, chunksize:int, **kwargs):
+    """DataFrames of at most 'chunksize' rows of a CSV or parquet file"""
+    if file_format == 'csv':
+        with pd.read_csv(source, chunksize=chunksize, **kwargs) as reader:
+            yield from reader
+    else:
+        # pyarrow is only needed for parquet files
+        import pyarrow.parquet as pq # pylint: disable=import-outside-toplevel
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, **kwargs):
+            yield batch.to_pandas()
+
+
+class _SplitWriter:
+    """Appends the chunks of one split to a CSV or parquet file"""
+    def __init__(self, file:str, file_format:str):
+        self.file = file
+        self.file_format = file_format
+        self._writer = None
+        self._header = True
+
+    def write(self, df:pd.DataFrame):
+        if self.file_format == 'csv':
+            df.to_csv(self.file, mode='w' if self._header else 'a',
+                      header=self._header, index=False)
+            self._header = False
+        else:
+            import pyarrow as pa # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet as pq # pylint: disable=import-outside-toplevel
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.file, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def stream_data_split(source:str, path:str, train_size:float=0.8,
+    test_size:float=0.1, strat_col:Union[str,None]=None,
+    oot_dt_col:Union[str,None]=None, oot_dt:Union[str,None]=None,
+    seed:int=42, chunksize:int=1_000_000, file_format:Union[str,None]=None,
+    **kwargs) -> pd.Series:
+    """
+    Split a CSV or parquet file too large for memory into TRAIN, TEST,
+    VAL and OOT files, reading it 'chunksize' rows at a time
+
+    Rows are assigned as by `data_split` with method='hash': OOT if
+    their 'oot_dt_col' is on or after 'oot_dt', otherwise by a hash of
+    their 'strat_col' value, or of their row number, so the result is
+    the same as `data_split` on the whole file and does not depend on
+    'chunksize', nor on the dtype each chunk's 'strat_col' is read as
+
+    Parameters
+    ----------
+    source : str
+        CSV or parquet file
+
+    path : str
+        directory to write TRAIN, TEST, VAL and OOT files to, created if
+        needed. Splits without any rows get no file
+
+    train_size, test_size, strat_col, oot_dt_col, oot_dt, seed :
+        as for `data_split`. Rows with a missing 'strat_col' value are
+        not written
+
+    chunksize : int
+        number of rows read at a time
+
+    file_format : str
+        'csv' or 'parquet', of both the source and the output files. By
+        default, taken from the extension of 'source'
+
+    **kwargs : passed to pandas.read_csv, or to
+        pyarrow.parquet.ParquetFile.iter_batches (e.g. columns)
 
-    return df
+    Returns
+    -------
+    pandas.Series
+        number of rows written to each split
+    """
+    if file_format is None:
+        ext = os.path.splitext(source)[1].lower()
+        file_format = 'parquet' if ext in ('.parquet', '.pq') else 'csv'
+    if file_format not in ('csv', 'parquet'):
+        raise ValueError("file_format must be 'csv' or 'parquet'")
+    os.makedirs(path, exist_ok=True)
 
+    writers = {}
+    counts = np.zeros(len(SPLITS), dtype=np.int64)
+    start = 0
+    try:
+        for chunk in _read_chunks(source, file_format, chunksize, **kwargs):
+            oot = _oot_mask(chunk, oot_dt_col, oot_dt)
+            if strat_col:
+                key = chunk[strat_col].to_numpy()
+            else:
+                key = np.arange(start, start + len(chunk))
+            start += len(chunk)
+            codes = _split_codes(_hash_unit(key, seed), train_size, test_size)
+            codes[oot] = _OOT
+            if strat_col:
+                codes[~oot & pd.isna(key)] = -1
+            counts += np.bincount(codes[codes >= 0], minlength=len(SPLITS))
+            for i, split in enumerate(SPLITS):
+                rows = codes == i
+                if not rows.any():
+                    continue
+                if split not in writers:
+                    writers[split] = _SplitWriter(
+                        os.path.join(path, f"{split}.{file_format}"), file_format)
+                writers[split].write(chunk[rows])
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return pd.Series(counts, index=SPLITS, name='rows')
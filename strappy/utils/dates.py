@@ -4,39 +4,213 @@ Date utilities
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+
+_DAY = 86400 * 10**9
+# weeks start on Monday 1970-01-05, four days after the epoch
+_WEEK_ORIGIN = 4 * _DAY
+_NAT = np.iinfo(np.int64).min
+_UNITS = {'day': 'D', 'week': 'W', 'month': 'M', 'year': 'Y'}
+
+
+def _nanoseconds(d):
+    """
+    int64 nanoseconds since the epoch of the datetimes in 'd', with NaT
+    as the smallest int64. Timezone-aware datetimes are taken at their
+    wall-clock time
+    """
+    if getattr(d.dtype, 'tz', None) is not None:
+        d = pd.DatetimeIndex(d).tz_localize(None)
+    return np.asarray(d, dtype='datetime64[ns]').view(np.int64)
+
+
+class DateBinner:
+    """
+    Bin datetimes with integer arithmetic on their nanosecond values
+
+    Parameters
+    ----------
+    bins : int, str, pandas.Timedelta or 1D array-like of datetimes
+        - int: number of equal-width bins spanning the data, with edges
+          rounded down to the day, closed on the right
+        - 'day', 'week' (from Monday), 'month' or 'year', or 'D', 'W',
+          'M' or 'Y': calendar bins, closed on the left
+        - other str or Timedelta: bins of that fixed width from the
+          epoch, closed on the left
+        - array-like: bin edges, closed on the right
+
+    label : str
+        date labelling each bin: 'left', 'right' or 'midpoint'. Midpoints
+        of bins at least a day wide are rounded down to the day
+
+    Attributes
+    ----------
+    edges_ : pandas.DatetimeIndex
+        edges of the bins
+
+    labels_ : pandas.DatetimeIndex
+        label of each bin
+
+    closed : str
+        'right' or 'left', the side on which bins are closed
+    """
+    def __init__(self, bins=10, label='midpoint'):
+        if label not in ('left', 'right', 'midpoint'):
+            raise ValueError("label must be one of 'left', 'right' or 'midpoint'")
+        self.bins = bins
+        self.label = label
+
+    def fit(self, d):
+        """
+        Compute the bins spanning 'd'
+
+        Parameters
+        ----------
+        d : 1D array-like of datetimes
+
+        Returns
+        -------
+        self
+        """
+        v = _nanoseconds(d)
+        mx = v.max() if v.size else _NAT
+        if mx == _NAT:
+            raise ValueError("d must have at least one non-missing datetime")
+        mn = np.min(v, where=v != _NAT, initial=mx)
+
+        bins = self.bins
+        if isinstance(bins, str):
+            bins = _UNITS.get(bins, bins)
+        self._unit, self._width, self._origin, self._start = None, None, 0, 0
+        self.closed = 'left'
+        if isinstance(bins, (int, np.integer)):
+            # the same equal-width bins pd.cut draws, widened to whole days
+            _, edges = pd.cut(
+                pd.DatetimeIndex(np.array([mn, mx]).view('datetime64[ns]')),
+                bins, retbins=True)
+            edges = np.floor_divide(edges.asi8, _DAY) * _DAY
+            edges[-1] += _DAY
+            edges = np.unique(edges)
+            self.closed = 'right'
+        elif isinstance(bins, str) and bins in ('M', 'Y'):
+            self._unit = bins
+            start, stop = np.array([mn, mx]).view('datetime64[ns]') \
+                .astype(f'datetime64[{bins}]')
+            edges = np.arange(start, stop + 2).astype('datetime64[ns]').view(np.int64)
+            self._start = start.astype(np.int64)
+        elif isinstance(bins, (str, pd.Timedelta, np.timedelta64)):
+            if isinstance(bins, str) and bins == 'W':
+                self._width, self._origin = 7 * _DAY, _WEEK_ORIGIN
+            elif isinstance(bins, str):
+                self._width = pd.Timedelta(pd.tseries.frequencies.to_offset(bins)).value
+            else:
+                self._width = pd.Timedelta(bins).value
+            if self._width <= 0:
+                raise ValueError("bin width must be positive")
+            start, stop = (np.array([mn, mx]) - self._origin) // self._width
+            edges = self._origin + np.arange(start, stop + 2) * self._width
+            self._start = start
+        else:
+            edges = _nanoseconds(pd.DatetimeIndex(bins))
+            if (np.diff(edges) <= 0).any():
+                raise ValueError("bins must increase monotonically")
+            self.closed = 'right'
+
+        self._edges = edges
+        self.edges_ = pd.DatetimeIndex(edges.view('datetime64[ns]'))
+        left, right = edges[:-1], edges[1:]
+        if self.label == 'left':
+            labels = left
+        elif self.label == 'right':
+            labels = right
+        else:
+            labels = left + (right - left) // 2
+            if (right - left >= _DAY).all():
+                labels = np.floor_divide(labels, _DAY) * _DAY
+        self.labels_ = pd.DatetimeIndex(labels.view('datetime64[ns]'))
+        return self
+
+    def transform(self, d, codes=False):
+        """
+        Bin 'd'
+
+        Parameters
+        ----------
+        d : 1D array-like of datetimes
+
+        codes : Boolean
+            if True, return the bin number of each datetime instead of
+            its label
+
+        Returns
+        -------
+        numpy 1D array of datetime64[ns] labels, NaT for missing values
+        and values outside the bins, or of int64 codes, -1 for those
+        """
+        v = _nanoseconds(d)
+        n = len(self._edges) - 1
+        if self._unit is not None:
+            c = v.view('datetime64[ns]').astype(f'datetime64[{self._unit}]') \
+                .view(np.int64) - self._start
+        elif self._width is not None:
+            c = (v - self._origin) // self._width - self._start
+        else:
+            side = 'left' if self.closed == 'right' else 'right'
+            c = np.searchsorted(self._edges, v, side=side) - 1
+        c[(c < 0) | (c >= n) | (v == _NAT)] = -1
+        if codes:
+            return c
+        return self.label_codes(c)
+
+    def fit_transform(self, d, codes=False):
+        """`fit` to 'd', then `transform` it"""
+        return self.fit(d).transform(d, codes=codes)
+
+    def label_codes(self, codes):
+        """
+        Label of each bin number in 'codes', NaT for -1
+
+        Returns
+        -------
+        numpy 1D array of datetime64[ns]
+        """
+        values = self.labels_.asi8[codes]
+        values[codes < 0] = _NAT
+        return values.view('datetime64[ns]')
+
 
 def bin_dates(d, bins=10, midpoints=True):
     """
     Bin a 1d-array-like of datetimes
-    
+
     Parameters
     ----------
     d : 1D array-like of datetimes
-    
-    bins : int or 1D array-like of datetimes
-    
+
+    bins : int, str or 1D array-like of datetimes
+        number of bins, calendar unit or width of the bins, or bin edges,
+        as for `DateBinner`
+
     midpoints : Boolean
         if True, use midpoints of bins as labels
         if False, use bins from pandas.cuts as labels
-        
+
     Returns
     -------
-    pandas.Series of binned dates
+    pandas.Series of binned dates, as datetime64 midpoints or
+    categorical intervals (a numpy array or pandas.Categorical if 'd'
+    is not a Series)
     """
     if not pd.api.types.is_datetime64_any_dtype(d):
         raise(TypeError("d must be of type datetime64"))
-    if isinstance(bins,int):
-        z, bins = pd.cut(d,bins,retbins=True)
-        bins = [pd.to_datetime(s.date()) for s in bins.tolist()]
-        bins[-1] = bins[-1] + pd.DateOffset(1)
-        
+    binner = DateBinner(bins).fit(d)
+    codes = binner.transform(d, codes=True)
+
     if midpoints:
-        m = [(bins[i-1] + (bins[i] - bins[i-1])/2).date() for i in range(1,len(bins))]
-        d = pd.to_datetime(pd.cut(d,bins,labels=[str(i) for i in m])).dt.date
+        z = binner.label_codes(codes)
     else:
-        d = pd.cut(d,bins)
-        
-    return(d)
-
+        z = pd.Categorical.from_codes(
+            codes, pd.IntervalIndex.from_breaks(binner.edges_, closed=binner.closed))
 
+    if isinstance(d, pd.Series):
+        z = pd.Series(z, index=d.index, name=d.name)
+    return(z)
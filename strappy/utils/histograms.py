@@ -1,14 +1,22 @@
 import numpy as np
 import math
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
 from decimal import Decimal
 from .dates import bin_dates
 from .binners import (
     cutpoints,
-    human_readable_num,
-    cutter
+    _weights
+)
+from .sketches import more_distinct_than
+from .cache import cached
+from .aggregates import (
+    _numeric_levels,
+    _categorical_levels,
+    _histogram_frame,
+    _filled_levels,
+    _joint_counts,
+    contingency_table
 )
 
 
@@ -46,13 +54,15 @@ def plot_bar(p,
     ---------------------------
     fig : a matplotlib figure
     '''
+    import matplotlib as mpl # pylint: disable=import-outside-toplevel
     if 'fig' in kwargs.keys() and 'ax' in kwargs.keys():
         fig = kwargs['fig']; ax = kwargs['ax']
     else:
+        import matplotlib.pyplot as plt # pylint: disable=import-outside-toplevel
         fig = plt.figure()
-        ax = plt.gca()
+        ax = fig.gca()
         
-    prop_iter = iter(plt.rcParams['axes.prop_cycle'])
+    prop_iter = iter(mpl.rcParams['axes.prop_cycle'])
         
     n = p.shape[0]
     if not normalize:
@@ -89,13 +99,12 @@ def plot_bar(p,
             )
         twinx.spines['top'].set_visible(False)
         if 'ylabel' in kwargs:
-            plt.ylabel(kwargs['ylabel'], labelpad = 15)
+            twinx.set_ylabel(kwargs['ylabel'], labelpad = 15)
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
-    plt.sca(ax)
-    plt.ylabel(_stat_label)
+    ax.set_ylabel(_stat_label)
     if 'xlabel' in kwargs:
-        plt.xlabel(kwargs['xlabel'])
+        ax.set_xlabel(kwargs['xlabel'])
     return(fig)
 
 
@@ -108,6 +117,7 @@ def _numeric_histogram(
     max_levels = 20,
     stat = 'mean',
     binner = True,
+    weights = None,
     **kwargs):
     '''
     Function for histogramming a numeric column into bins and
@@ -127,6 +137,12 @@ def _numeric_histogram(
     
     stat : aggregate statistic to calculate on 'oth_columns' within
         bins of 'x'
+
+    weights : str or 1-D array-like
+        optional column of 'df', or array, with the weight (e.g. count)
+        of each row, for pre-aggregated data. Bins and counts are then
+        weighted, and 'stat' must be one of 'count', 'sum', 'mean' or
+        'rate'
         
     Returns
     ---------------------------
@@ -136,41 +152,19 @@ def _numeric_histogram(
         oth_columns = []
     elif isinstance(oth_columns,str):
         oth_columns = [oth_columns]
-    
-    #x_grp = x + ' _GROUPED_'
-    
-    if len(oth_columns) > 0:
-        stats = dict(zip(oth_columns,[stat]*len(oth_columns)))
-    else:
-        stats = dict()
-        
-    stats['_COUNT_'] = 'sum'
-    
-    if binner:
-        p = (
-            df[[*oth_columns,x]].copy()
-            .assign(**{x: lambda z: cutter(z,x,max_levels,**kwargs)})
-            .replace({x:{np.nan:'MISSING'}})
-            .assign(_COUNT_ = 1)
-            .groupby(x)
-            .agg(stats)
-            .reset_index()
-            #.rename(columns = {x_grp:x})
-            )
-    else:
-        p = (
-            df[[*oth_columns,x]].copy()
-            .assign(_COUNT_ = 1)
-            .groupby(x,dropna=False)
-            .agg(stats)
-            .reset_index()
-            )
-        vals = p[x].unique().tolist()
-        vals_format = [str(i+1).zfill(2) +
-                       ": " + human_readable_num(j)
-                       for i,j in enumerate(vals)]
-        p.loc[:,x] = p[x].map(dict(zip(vals, vals_format)))
 
+    def compute():
+        w = _weights(df, weights)
+        codes, labels = _numeric_levels(
+            df, x, max_levels=max_levels, binner=binner, weights=w, **kwargs)
+        return _histogram_frame(df, x, codes, labels, oth_columns, stat, w)
+
+    columns = [x, *oth_columns] + ([weights] if isinstance(weights, str) else [])
+    p = cached(
+        'numeric_histogram', df, columns,
+        dict(oth_columns=oth_columns, max_levels=max_levels, stat=stat,
+             binner=binner, weights=weights, **kwargs),
+        compute)
     return(p)
 
 def _categorical_histogram(
@@ -213,38 +207,17 @@ def _categorical_histogram(
         oth_columns = []
     elif isinstance(oth_columns,str):
         oth_columns = [oth_columns]
-    
-    x_grp = '_' + x + ' _GROUPED_'
-    
-    def _max_lvl_cutoff(f):
-        y = f[x] if f.RN <= max_levels else oth_val
-        return(y)
-    
-    k = {x_grp: lambda z: z.apply(_max_lvl_cutoff, axis = 1)}
-    #k = {x: lambda z: z.apply(_max_lvl_cutoff, axis = 1)}
-    cnts = (
-        df.groupby(x)
-          .size()
-          .to_frame(name='_COUNT_')
-          .reset_index()
-          .sort_values('_COUNT_',ascending = False)
-          .assign(RN = lambda x: x['_COUNT_'].rank(method = 'first',ascending = False))
-          .assign(**k)
-        )
-    m = dict(zip(cnts[x],cnts[x_grp]))
-    if len(oth_columns) > 0:
-        stats = dict(zip(oth_columns,[stat]*len(oth_columns)))
-    else:
-        stats = dict()
-    stats['_COUNT_'] = 'sum'
-    p = (
-        df.assign(**{x_grp: lambda f: f[x].map(m)})
-          .assign(_COUNT_ = 1)
-          .groupby(x_grp)
-          .agg(stats)
-          .reset_index()
-          .rename(columns = {x_grp:x})
-    )
+
+    def compute():
+        codes, labels = _categorical_levels(
+            df, x, max_levels=max_levels, oth_val=oth_val)
+        return _histogram_frame(df, x, codes, labels, oth_columns, stat)
+
+    p = cached(
+        'categorical_histogram', df, [x, *oth_columns],
+        dict(oth_columns=oth_columns, max_levels=max_levels,
+             oth_val=oth_val, stat=stat),
+        compute)
     return(p)
 
 def numeric_histogram(
@@ -288,7 +261,7 @@ def numeric_histogram(
     if 'binner' in kwargs:
         #binner = kwargs['binner']
         pass
-    elif len(df[x].unique()) > min_levels:
+    elif more_distinct_than(df[x], min_levels):
         kwargs['binner'] = True
     else:
         kwargs['binner'] = False
@@ -369,6 +342,8 @@ def categorical_heatmap(
     y,
     stat = 'size',
     fillna = 'MISSING',
+    max_levels = None,
+    oth_val = '_OTHER_',
     width_ratios = [3,1],
     height_ratios = [1,3],
     cmap = 'hot'):
@@ -392,6 +367,13 @@ def categorical_heatmap(
     fillna : str
         value to fill numpy NaNs with
     
+    max_levels : int
+        optional maximum number of levels of each of 'x' and 'y'. The
+        max_levels values with the greatest record counts receive their
+        own levels, all other values are binned as 'oth_val'
+    
+    oth_val : str used as value for levels with fewer record counts
+    
     width_ratios : iterable of length 2
         ratio of the width of the heatmap to the 'y' marginal plot
     
@@ -405,10 +387,98 @@ def categorical_heatmap(
     -------------------------------
     fig : a matplotlib figure
     """
+    df2, dfx, dfy = cached(
+        'categorical_heatmap', df,
+        [x, y] if stat == 'size' else list(df.columns),
+        dict(x=x, y=y, stat=stat, fillna=fillna,
+             max_levels=max_levels, oth_val=oth_val),
+        lambda: _heatmap_data(df, x, y, stat=stat, fillna=fillna,
+                              max_levels=max_levels, oth_val=oth_val))
+    
+    fig = _plot_heatmap(
+        df2, dfx, dfy, x, y, width_ratios=width_ratios,
+        height_ratios=height_ratios, cmap=cmap)
+    return(fig)
+
+
+def numeric_heatmap(
+    df,
+    x,
+    y,
+    max_levels = 20,
+    width_ratios = [3,1],
+    height_ratios = [1,3],
+    cmap = 'hot',
+    **kwargs):
+    """
+    Function for creating bivariate numeric heatmap: the counts of
+    records in each pair of bins of 'x' and 'y', binned as by
+    `numeric_histogram` with point masses and missing values given
+    their own bins
     
-    df2 = df.fillna({x:fillna,y:fillna}) \
-        .groupby([x,y]).agg(stat).unstack(0)
+    Parameters
+    -------------------------------
+    df : pandas.DataFrame object
     
+    x : str
+        numeric variable in 'df' to plot along the x-axis
+    
+    y : str
+        numeric variable in 'df' to plot along the y-axis
+    
+    max_levels : int
+        maximum number of bins to create from each of 'x' and 'y'
+    
+    width_ratios : iterable of length 2
+        ratio of the width of the heatmap to the 'y' marginal plot
+    
+    height_ratios : iterable of length 2
+        ratio of the height of the 'x' marginal plot to the heatmap
+    
+    cmap : str
+        name of matplotlib registered colormap
+    
+    **kwargs : passed to `cutter`
+    
+    Returns
+    -------------------------------
+    fig : a matplotlib figure
+    """
+    df2, dfx, dfy = cached(
+        'numeric_heatmap', df, [x, y],
+        dict(x=x, y=y, max_levels=max_levels, **kwargs),
+        lambda: _numeric_heatmap_data(df, x, y, max_levels=max_levels, **kwargs))
+    
+    fig = _plot_heatmap(
+        df2, dfx, dfy, x, y, width_ratios=width_ratios,
+        height_ratios=height_ratios, cmap=cmap, origin='lower')
+    return(fig)
+
+
+def _numeric_heatmap_data(df, x, y, max_levels = 20, **kwargs):
+    """
+    Aggregates drawn by `numeric_heatmap`: the counts of the bins of
+    'y' (rows) by those of 'x' (columns), and of the bins of either
+    """
+    axes = []
+    for col in [x, y]:
+        codes, labels = _numeric_levels(df, col, max_levels=max_levels, **kwargs)
+        labels = labels.categories
+        # the missing bin comes last, leave it out if it is empty
+        if not (codes == len(labels) - 1).any():
+            labels = labels[:-1]
+        axes.extend([codes, pd.Index(labels, name=col)])
+    return _joint_counts(*axes)
+
+
+def _plot_heatmap(df2, dfx, dfy, x, y, width_ratios = [3,1],
+                  height_ratios = [1,3], cmap = 'hot', origin = 'upper'):
+    """
+    Draw the table 'df2' as a heatmap with the bar charts of its
+    marginals 'dfx' above and 'dfy' to the right
+    """
+    import matplotlib.pyplot as plt # pylint: disable=import-outside-toplevel
+
     fig, axes = plt.subplots(
     nrows = 2,
     ncols = 2,
@@ -420,7 +490,7 @@ def categorical_heatmap(
         'height_ratios' : height_ratios}
     )
 
-    heatmap = axes[1,0].imshow(df2,aspect='auto',cmap = 'hot');
+    heatmap = axes[1,0].imshow(df2,aspect='auto',cmap = cmap,origin = origin);
 
     axes[1,0].set_xticks(range(len(df2.columns.tolist())));
     axes[1,0].set_xticklabels(df2.columns.tolist(),rotation=45, ha='right');
@@ -429,11 +499,9 @@ def categorical_heatmap(
     axes[1,0].set_yticklabels(df2.index.tolist());
     axes[1,0].set_ylabel(y);
 
-    dfx = df.groupby(x).size();
     axes[0,0].bar(range(len(dfx.index.tolist())),dfx.values);
 
 
-    dfy = df.groupby(y).size();
     axes[1,1].barh(range(len(dfy.index.tolist())),dfy.values);
 
     axes[0,1].axis('off');
@@ -444,10 +512,27 @@ def categorical_heatmap(
 
     axes[1,0].spines['top'].set_visible(False);
     axes[1,0].spines['right'].set_visible(False);
-    plt.colorbar(heatmap);
+    fig.colorbar(heatmap);
     return(fig)
 
 
+def _heatmap_data(df, x, y, stat = 'size', fillna = 'MISSING',
+                  max_levels = None, oth_val = '_OTHER_'):
+    """
+    Aggregates drawn by `categorical_heatmap`: the table of 'stat' by
+    'y' (rows) and 'x' (columns), and the counts of 'x' and of 'y'
+    """
+    df2, dfx, dfy = contingency_table(
+        df, x, y, max_levels=max_levels, oth_val=oth_val, fillna=fillna)
+    if stat != 'size':
+        xcodes, xlabels = _filled_levels(df, x, max_levels, oth_val, fillna)
+        ycodes, ylabels = _filled_levels(df, y, max_levels, oth_val, fillna)
+        keys = [pd.Index(xlabels, name=x).take(xcodes),
+                pd.Index(ylabels, name=y).take(ycodes)]
+        df2 = df.drop(columns=[x, y]).groupby(keys).agg(stat).unstack(0)
+    return df2, dfx, dfy
+
+
 def _stacked_histogram(
     df, x, stack_var, stat = 'count',
     ax = None):
@@ -470,26 +555,31 @@ def _stacked_histogram(
     ax : matplotlib axis object
         if None, function will create one
     """
+    import matplotlib.pyplot as plt # pylint: disable=import-outside-toplevel
     p = df.loc[:,[x,stack_var]] \
-        .groupby([x,stack_var], dropna=False).size()
+        .groupby([x,stack_var], dropna=False, observed=True).size()
     if stat == 'percent':
         p = p.groupby(x).transform(lambda x: x/x.sum())
     if ax is None:
         fig = plt.figure(figsize=(12,5))
         ax = fig.gca()
-    p = p.stack(1) \
+    p = p.unstack(1) \
         .plot.bar(ax = ax, stacked = True, width = 0.95);
     p.legend(title = stack_var, bbox_to_anchor = (1.05, 1), loc='upper left');
-    plt.xticks(rotation = 45, ha = 'right')
+    plt.setp(p.get_xticklabels(), rotation = 45, ha = 'right')
     return(p)
 
 def stacked_dates_histogram(
     df, date_var, cat_var, ax = None,
     title = None, bins = 30, midpoints = True,
     stat = 'count'):
+    import matplotlib.pyplot as plt # pylint: disable=import-outside-toplevel
     
-    df = df.loc[:,[date_var,cat_var]].copy()
-    df.loc[:,date_var] = bin_dates(df.loc[:,date_var], bins, midpoints)
+    z = bin_dates(df[date_var], bins, midpoints)
+    if midpoints:
+        # label the bins by day without building a date object per row
+        z = z.astype('category').cat.rename_categories(lambda t: t.date())
+    df = pd.DataFrame({date_var: z, cat_var: df[cat_var]})
     
     if ax is None:
         fig = plt.figure(figsize=(12,5))
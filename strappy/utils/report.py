@@ -0,0 +1,210 @@
+"""
+Batch EDA report: a histogram of every column, written as PNGs with an
+index HTML page
+"""
+
+import os
+import re
+import html
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import _numeric_levels, _categorical_levels, _histogram_frame
+from .dates import DateBinner
+from .sketches import more_distinct_than
+
+
+def _column_kind(x):
+    """'numeric', 'date' or 'categorical' histogram for a column"""
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return 'date'
+    if pd.api.types.is_numeric_dtype(x) and not pd.api.types.is_bool_dtype(x):
+        return 'numeric'
+    return 'categorical'
+
+
+def _column_histogram(df, x, line_columns, stat='mean', max_levels=20, min_levels=20):
+    """
+    Aggregates of the histogram `numeric_histogram` or
+    `categorical_histogram` would draw for column 'x'
+
+    Returns
+    -------
+    kind : str
+
+    p : pandas.DataFrame as plotted by `plot_bar`
+    """
+    kind = _column_kind(df[x])
+    if kind == 'numeric':
+        codes, labels = _numeric_levels(
+            df, x, max_levels=max_levels,
+            binner=more_distinct_than(df[x], min_levels))
+    elif kind == 'date':
+        binner = DateBinner(max_levels).fit(df[x])
+        codes = binner.transform(df[x], codes=True)
+        labels = binner.labels_.date
+    else:
+        codes, labels = _categorical_levels(df, x, max_levels=max_levels)
+    return kind, _histogram_frame(df, x, codes, labels, line_columns, stat)
+
+
+def _slug(i, x):
+    """File-name and HTML-id safe name of the i-th column 'x'"""
+    return f"{i:04d}_{re.sub(r'[^A-Za-z0-9_.-]+', '_', str(x))[:64]}"
+
+
+def _render_column(task, path, line_columns, stat='mean', max_levels=20,
+                   min_levels=20, normalize=False, dpi=100):
+    """
+    Compute and save the histogram of one column. Runs in the worker
+    processes, so figures are drawn on their own Agg canvas without
+    pyplot and are freed as soon as they are saved
+    """
+    # deferred so worker processes only pay for matplotlib when rendering
+    from matplotlib.figure import Figure # pylint: disable=import-outside-toplevel
+    from .histograms import plot_bar # pylint: disable=import-outside-toplevel
+
+    i, x, df = task
+    file = f"{_slug(i, x)}.png"
+    res = {'column': x, 'kind': _column_kind(df[x]), 'levels': np.nan,
+           'file': file, 'error': None}
+    try:
+        res['kind'], p = _column_histogram(
+            df, x, line_columns, stat=stat,
+            max_levels=max_levels, min_levels=min_levels)
+        res['levels'] = len(p)
+        fig = Figure(figsize=(8, 5))
+        plot_bar(p, x=x, line_columns=line_columns or None, normalize=normalize,
+                 fig=fig, ax=fig.add_subplot(), xlabel=str(x))
+        fig.savefig(os.path.join(path, file), dpi=dpi, bbox_inches='tight')
+    except Exception as e: # pylint: disable=broad-except
+        # one failing column should not lose the rest of the report
+        res['file'] = None
+        res['error'] = f"{type(e).__name__}: {e}"
+    return res
+
+
+def _imap(ex, fn, tasks, n_pending):
+    """
+    Ordered `Executor.map` that only keeps `n_pending` tasks in flight,
+    so only that many column slices are held in memory at once
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(ex.submit(fn, task))
+        if len(pending) >= n_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _write_index(path, summary, title):
+    rows, toc = [], []
+    for i, r in enumerate(summary.itertuples(index=False)):
+        name = html.escape(str(r.column))
+        # from the column, as failed columns have no file
+        slug = html.escape(_slug(i, r.column))
+        if r.file is None:
+            body = f"<pre>{html.escape(str(r.error))}</pre>"
+        else:
+            body = f'<img src="{html.escape(r.file)}" alt="{name}" loading="lazy">'
+        rows.append(f'<section id="{slug}">'
+                    f'<h2>{name}</h2><p>{r.kind}, {r.levels} levels</p>{body}</section>')
+        toc.append(f'<li><a href="#{slug}">{name}</a></li>')
+    toc = "".join(toc)
+    page = (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+            f"<title>{html.escape(title)}</title></head><body>"
+            f"<h1>{html.escape(title)}</h1><ol>{toc}</ol>{''.join(rows)}</body></html>")
+    index = os.path.join(path, 'index.html')
+    with open(index, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return index
+
+
+def eda_report(
+    df,
+    path,
+    columns = None,
+    line_columns = None,
+    stat = 'mean',
+    max_levels = 20,
+    min_levels = 20,
+    normalize = False,
+    n_jobs = 1,
+    dpi = 100,
+    title = 'EDA report'):
+    '''
+    Write a histogram of every column of 'df' to 'path' as PNG files,
+    with an index.html page showing all of them
+
+    Numeric columns are drawn as by `numeric_histogram`, dates are binned
+    with `DateBinner` and other columns drawn as by
+    `categorical_histogram`. Aggregation and rendering run in 'n_jobs'
+    worker processes on matplotlib Figures that are not registered with
+    pyplot, and only a few columns are in flight at a time, so memory
+    does not grow with the number of columns.
+
+    Parameters
+    --------------------------
+    df : pandas DataFrame object
+
+    path : str
+        directory to write the report to, created if needed
+
+    columns : optional list of the columns to report on. By default,
+        all columns not in 'line_columns'
+
+    line_columns : optional list of columns on which to calculate and
+        plot 'stat' within the levels of each column
+
+    stat : aggregate statistic to calculate on 'line_columns'
+
+    max_levels : maximum number of levels per histogram
+
+    min_levels : numeric columns with more than min_levels distinct
+        values are binned
+
+    normalize : Boolean
+        If True, use percents instead of counts
+
+    n_jobs : int
+        number of worker processes, -1 uses all processors
+
+    dpi : int
+        resolution of the PNG files
+
+    title : str
+        title of the index page
+
+    Returns
+    ---------------------------
+    summary : pandas DataFrame object
+        one row per column with its histogram kind, number of levels,
+        PNG file name and error message if it could not be drawn
+    '''
+    if line_columns is None:
+        line_columns = []
+    elif isinstance(line_columns, str):
+        line_columns = [line_columns]
+    if columns is None:
+        columns = [c for c in df.columns if c not in line_columns]
+    os.makedirs(path, exist_ok=True)
+
+    tasks = ((i, x, df[[x, *line_columns]]) for i, x in enumerate(columns))
+    render = partial(
+        _render_column, path=path, line_columns=line_columns, stat=stat,
+        max_levels=max_levels, min_levels=min_levels, normalize=normalize, dpi=dpi)
+    if n_jobs == 1:
+        results = list(map(render, tasks))
+    else:
+        n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+            results = list(_imap(ex, render, tasks, 2 * n_jobs))
+
+    summary = pd.DataFrame(results, columns=['column', 'kind', 'levels', 'file', 'error'])
+    _write_index(path, summary, title)
+    return summary
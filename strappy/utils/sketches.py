@@ -0,0 +1,566 @@
+"""
+Mergeable sketches for summarizing columns in bounded memory
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class FrequentItemsSketch:
+    """
+    Misra-Gries frequent items (heavy hitters) sketch
+
+    Keeps at most `max_items` counters. Every estimated count
+    underestimates the true count by at most `error_bound`, and any item
+    with true count greater than `error_bound` is guaranteed to be kept.
+    Sketches built on different chunks or workers can be combined with
+    `merge`.
+
+    Parameters
+    ----------
+    max_items : int
+        maximum number of counters to keep
+
+    Attributes
+    ----------
+    counts : pandas.Series
+        estimated counts of the retained items, including missing values
+
+    n : int
+        number of values summarized
+    """
+    def __init__(self, max_items=1000):
+        if max_items < 1:
+            raise ValueError("`max_items` must be a positive integer")
+        self.max_items = max_items
+        self.counts = pd.Series(dtype='int64')
+        self.n = 0
+        self._error = 0
+
+    @property
+    def error_bound(self):
+        """Maximum amount by which any count in `counts` is underestimated"""
+        return min(
+            self._error,
+            (self.n - int(self.counts.sum())) // (self.max_items + 1))
+
+    def update(self, x, block_size=2**20):
+        """
+        Add values to the sketch
+
+        The values are counted `block_size` rows at a time, so memory is
+        bounded by the distinct values in one block plus `max_items`.
+        A block with more than `max_items + 1` distinct values is first
+        shrunk to its `max_items + 1` largest counts less the next
+        largest one, a Misra-Gries step of its own, so `error_bound`
+        still holds.
+
+        Parameters
+        ----------
+        x : 1-D array-like
+
+        block_size : int
+            number of values counted at a time
+
+        Returns
+        -------
+        self
+        """
+        x = x if isinstance(x, pd.Series) else pd.Series(x)
+        for start in range(0, len(x), block_size):
+            block = x.iloc[start:start + block_size]
+            if block.dtype.kind in 'biuf' and not block.hasnans:
+                values, cnts = np.unique(block.to_numpy(), return_counts=True)
+                cnts = pd.Series(cnts, index=values)
+            else:
+                cnts = block.value_counts(dropna=False)
+            cut = 0
+            if len(cnts) > self.max_items + 1:
+                cnts = cnts.nlargest(self.max_items + 2)
+                cut = cnts.iloc[-1]
+                cnts = cnts.iloc[:-1] - cut
+                cnts = cnts[cnts > 0]
+            self._add(cnts, len(block), cut)
+        return self
+
+    def merge(self, other):
+        """
+        Merge another FrequentItemsSketch into this one
+
+        Parameters
+        ----------
+        other : FrequentItemsSketch
+
+        Returns
+        -------
+        self
+        """
+        self._add(other.counts, other.n, other._error) # pylint: disable=protected-access
+        return self
+
+    def _add(self, cnts, n, error=0):
+        """
+        Add item counts, then shrink back to `max_items` counters by
+        subtracting the (max_items + 1)-th largest count from all of them
+        """
+        counts = self.counts.add(cnts, fill_value=0) \
+                     .sort_values(ascending=False, kind='stable')
+        if len(counts) > self.max_items:
+            cut = counts.iloc[self.max_items]
+            counts = counts.iloc[:self.max_items] - cut
+            counts = counts[counts > 0]
+            error += cut
+        self.counts = counts.astype('int64')
+        self.n += n
+        self._error += int(error)
+
+    def top(self, k):
+        """
+        Items with the `k` largest estimated counts
+
+        Parameters
+        ----------
+        k : int
+
+        Returns
+        -------
+        pandas.Series
+        """
+        return self.counts.head(k)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __repr__(self):
+        return (f"FrequentItemsSketch(max_items={self.max_items}, "
+                f"n={self.n}, items={len(self)}, error_bound={self.error_bound})")
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch
+
+    Summarizes a stream of numbers with about 3 * `k` retained items.
+    While fewer than `k` values have been added the sketch is exact and
+    `quantile` matches `numpy.quantile`; afterwards quantiles are
+    within `rank_error` of the true normalized rank with high
+    probability. Sketches built on different chunks or workers can be
+    combined with `merge`.
+
+    Parameters
+    ----------
+    k : int
+        accuracy parameter: rank error decreases roughly as 1/k
+
+    seed : int
+        seed for the random choices made when compacting
+
+    Attributes
+    ----------
+    n : int
+        number of non-missing values summarized
+
+    min, max : float
+        exact minimum and maximum of the values summarized
+    """
+    def __init__(self, k=200, seed=None):
+        if k < 2:
+            raise ValueError("`k` must be at least 2")
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def is_exact(self):
+        """True while no values have been compacted"""
+        return len(self._levels) == 1
+
+    @property
+    def rank_error(self):
+        """
+        Normalized rank error of `quantile` at 99% confidence, using the
+        empirical bound for KLL sketches from Apache DataSketches
+        """
+        return 0.0 if self.is_exact else 2.296 / self.k ** 0.9723
+
+    def update(self, x):
+        """
+        Add values to the sketch, ignoring NaNs
+
+        Parameters
+        ----------
+        x : 1-D array-like of numbers
+
+        Returns
+        -------
+        self
+        """
+        x = np.asarray(x, dtype=float).ravel()
+        x = x[~np.isnan(x)]
+        if len(x) > 0:
+            self.n += len(x)
+            self.min = min(self.min, x.min())
+            self.max = max(self.max, x.max())
+            self._levels[0] = np.concatenate([self._levels[0], x])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Merge another QuantileSketch into this one
+
+        Parameters
+        ----------
+        other : QuantileSketch
+
+        Returns
+        -------
+        self
+        """
+        for h, items in enumerate(other._levels): # pylint: disable=protected-access
+            if h == len(self._levels):
+                self._levels.append(np.empty(0))
+            self._levels[h] = np.concatenate([self._levels[h], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _capacity(self, h):
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self._levels) - 1 - h))))
+
+    def _compress(self):
+        """
+        Halve every level that is over capacity: sort it and promote
+        every other item, starting at a random offset, to the next level
+        where each item carries twice the weight
+        """
+        h = 0
+        while h < len(self._levels):
+            items = self._levels[h]
+            if len(items) <= self._capacity(h):
+                h += 1
+                continue
+            if h + 1 == len(self._levels):
+                self._levels.append(np.empty(0))
+            items = np.sort(items)
+            odd = len(items) % 2
+            self._levels[h] = items[:odd]
+            self._levels[h + 1] = np.concatenate(
+                [self._levels[h + 1], items[odd + self._rng.integers(2)::2]])
+            # adding a level lowers the capacity of the levels below it
+            h = 0
+
+    def _weighted_items(self):
+        items = np.concatenate(self._levels)
+        weights = np.concatenate(
+            [np.full(len(l), 2 ** h, dtype=np.int64) for h, l in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        """
+        Approximate quantiles
+
+        Parameters
+        ----------
+        q : float or array-like of floats in [0, 1]
+
+        Returns
+        -------
+        float or numpy.array
+        """
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan)
+        if self.is_exact:
+            return np.quantile(self._levels[0], q)
+        items, weights = self._weighted_items()
+        cum = np.cumsum(weights)
+        q = np.asarray(q, dtype=float)
+        idx = np.clip(np.searchsorted(cum, q * cum[-1], side='left'), 0, len(items) - 1)
+        res = np.where(q <= 0, self.min, np.where(q >= 1, self.max, items[idx]))
+        return res if res.ndim else float(res)
+
+    def without(self, values):
+        """
+        Copy of the sketch with the given values removed, e.g. to
+        summarize a column without its point masses
+
+        Parameters
+        ----------
+        values : 1-D array-like
+
+        Returns
+        -------
+        QuantileSketch
+        """
+        res = QuantileSketch(self.k)
+        res._rng = self._rng # pylint: disable=protected-access
+        res._levels = [l[~np.isin(l, values)] for l in self._levels] # pylint: disable=protected-access
+        res.n = int(sum(2 ** h * len(l) for h, l in enumerate(res._levels))) # pylint: disable=protected-access
+        if res.n > 0:
+            items = np.concatenate(res._levels) # pylint: disable=protected-access
+            res.min = self.min if self.min not in values else items.min()
+            res.max = self.max if self.max not in values else items.max()
+        return res
+
+    def __repr__(self):
+        return (f"QuantileSketch(k={self.k}, n={self.n}, "
+                f"rank_error={self.rank_error:.4f})")
+
+
+class NumericSketch:
+    """
+    Mergeable summary of a numeric column with everything needed to
+    construct bins: a QuantileSketch of the values and a
+    FrequentItemsSketch to find point masses
+
+    Parameters
+    ----------
+    k : int
+        accuracy parameter of the QuantileSketch
+
+    max_items : int
+        number of counters of the FrequentItemsSketch
+
+    seed : int
+        seed for the QuantileSketch
+
+    Attributes
+    ----------
+    quantiles : QuantileSketch
+
+    frequent_items : FrequentItemsSketch
+        counts of the non-missing values
+
+    n_missing : int
+        number of missing values seen
+    """
+    def __init__(self, k=200, max_items=1000, seed=None):
+        self.quantiles = QuantileSketch(k, seed=seed)
+        self.frequent_items = FrequentItemsSketch(max_items)
+        self.n_missing = 0
+
+    @property
+    def n(self):
+        """number of non-missing values summarized"""
+        return self.quantiles.n
+
+    def update(self, x):
+        """
+        Add values to the sketch
+
+        Parameters
+        ----------
+        x : 1-D array-like of numbers
+
+        Returns
+        -------
+        self
+        """
+        x = np.asarray(x, dtype=float).ravel()
+        missing = np.isnan(x)
+        self.n_missing += int(missing.sum())
+        x = x[~missing]
+        self.quantiles.update(x)
+        self.frequent_items.update(x)
+        return self
+
+    def merge(self, other):
+        """
+        Merge another NumericSketch into this one
+
+        Parameters
+        ----------
+        other : NumericSketch
+
+        Returns
+        -------
+        self
+        """
+        self.quantiles.merge(other.quantiles)
+        self.frequent_items.merge(other.frequent_items)
+        self.n_missing += other.n_missing
+        return self
+
+    def point_mass(self, threshold=0.1):
+        """
+        Values whose estimated frequency among the non-missing values
+        exceeds `threshold`
+
+        Parameters
+        ----------
+        threshold : float
+
+        Returns
+        -------
+        sorted 1-D numpy array
+        """
+        cnts = self.frequent_items.counts
+        if self.n == 0:
+            return np.array([])
+        v = cnts[cnts / self.n > threshold].index.to_numpy(dtype=float)
+        v.sort()
+        return v
+
+    def __repr__(self):
+        return (f"NumericSketch(n={self.n}, n_missing={self.n_missing}, "
+                f"rank_error={self.quantiles.rank_error:.4f})")
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct count sketch
+
+    Estimates the number of distinct values with relative standard
+    error `rse` = 1.04 / sqrt(2**p) using 2**p one-byte registers.
+    Values are hashed with `pandas.util.hash_array`. Sketches built on
+    different chunks or workers can be combined with `merge`.
+
+    Parameters
+    ----------
+    p : int
+        number of bits of the hash used to pick a register, 4 to 18
+    """
+    def __init__(self, p=14):
+        if not 4 <= p <= 18:
+            raise ValueError("`p` must be between 4 and 18")
+        self.p = p
+        self.registers = np.zeros(2 ** p, dtype=np.uint8)
+
+    @property
+    def rse(self):
+        """relative standard error of `estimate`"""
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update(self, x):
+        """
+        Add values to the sketch
+
+        Parameters
+        ----------
+        x : 1-D array-like
+
+        Returns
+        -------
+        self
+        """
+        x = x.to_numpy() if isinstance(x, (pd.Series, pd.Index)) else np.asarray(x)
+        if len(x) == 0:
+            return self
+        h = pd.util.hash_array(x)
+        p = np.uint64(self.p)
+        idx = (h >> np.uint64(64 - self.p)).astype(np.intp)
+        # the rank is one more than the number of leading zeros of the
+        # remaining bits, at most 64 - p + 1 thanks to the sentinel bit
+        w = (h << p) | (np.uint64(1) << (p - np.uint64(1)))
+        top = np.minimum(np.floor(np.log2(w.astype(float))), 63).astype(np.uint64)
+        # float rounding can overshoot by one just below a power of 2
+        top -= (w < (np.uint64(1) << top)).astype(np.uint64)
+        rank = (np.uint64(64) - top).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other):
+        """
+        Merge another HyperLogLog with the same `p` into this one
+
+        Parameters
+        ----------
+        other : HyperLogLog
+
+        Returns
+        -------
+        self
+        """
+        if other.p != self.p:
+            raise ValueError("Both sketches must have the same `p`")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """
+        Estimated number of distinct values
+
+        Returns
+        -------
+        float
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if est <= 2.5 * m and zeros > 0:
+            # linear counting is more accurate for small cardinalities
+            est = m * np.log(m / zeros)
+        return float(est)
+
+    def __repr__(self):
+        return f"HyperLogLog(p={self.p}, estimate={self.estimate():.0f})"
+
+
+def more_distinct_than(x, threshold, exact_limit=4096, p=14, block_size=2**16):
+    """
+    Whether `x` has more than `threshold` distinct values, counting
+    missing values as one value like `pandas.Series.unique`
+
+    `x` is read in blocks, starting small, and the answer is returned
+    as soon as it is known, so high-cardinality columns are decided
+    from their first rows. Thresholds below `exact_limit` are decided
+    exactly from the distinct values seen so far, which never grow much
+    beyond `threshold`. Larger thresholds use a HyperLogLog and stop
+    once the estimate is 3 standard errors above `threshold`; close to
+    the threshold the answer is approximate.
+
+    Parameters
+    ----------
+    x : 1-D array-like
+
+    threshold : int
+
+    exact_limit : int
+        largest threshold decided exactly
+
+    p : int
+        precision of the HyperLogLog
+
+    block_size : int
+        largest number of values read at a time
+
+    Returns
+    -------
+    bool
+    """
+    if isinstance(x, pd.Series) and isinstance(x.dtype, pd.CategoricalDtype):
+        if len(x.cat.categories) + 1 <= threshold:
+            return False
+    if len(x) <= threshold:
+        return False
+    x = x.to_numpy() if isinstance(x, (pd.Series, pd.Index)) else np.asarray(x)
+
+    if threshold < exact_limit:
+        seen = x[:0]
+        for block in _growing_blocks(x, block_size):
+            seen = pd.unique(np.concatenate([seen, pd.unique(block)]))
+            if len(seen) > threshold:
+                return True
+        return False
+
+    hll = HyperLogLog(p)
+    for block in _growing_blocks(x, block_size):
+        if hll.update(block).estimate() > threshold * (1 + 3 * hll.rse):
+            return True
+    return hll.estimate() > threshold
+
+
+def _growing_blocks(x, block_size):
+    """Consecutive slices of x of sizes 1024, 2048, ... up to block_size"""
+    start, size = 0, min(1024, block_size)
+    while start < len(x):
+        yield x[start:start + size]
+        start += size
+        size = min(2 * size, block_size)
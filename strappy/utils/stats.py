@@ -1,9 +1,10 @@
+import os
 import scipy.stats as ss
 import numpy as np
-from itertools import combinations_with_replacement
 import pandas as pd
 from scipy.sparse.csgraph import reverse_cuthill_mckee
 from scipy.sparse import csr_matrix
+from concurrent.futures import ProcessPoolExecutor
 
 def cramers_corrected_stat(confusion_matrix):
     """
@@ -32,10 +33,73 @@ def cramers_corrected_stat(confusion_matrix):
     kcorr = k - ((k-1)**2)/(n-1)
     return(np.sqrt(phi2corr / min( (kcorr-1), (rcorr-1))))
 
-def cramers_corrected_matrix(df, reorder_cuthill_mckee = True):
+def _chi2(observed):
+    """
+    Pearson's chi-square statistic of a contingency table without empty
+    rows or columns, with Yates' correction when there is one degree of
+    freedom, as from scipy.stats.chi2_contingency
+    """
+    n = observed.sum()
+    expected = np.outer(observed.sum(axis=1), observed.sum(axis=0)) / n
+    dof = (observed.shape[0] - 1) * (observed.shape[1] - 1)
+    if dof == 0:
+        return 0.0
+    if dof == 1:
+        diff = expected - observed
+        observed = observed + np.sign(diff) * np.minimum(0.5, np.abs(diff))
+    return ((observed - expected)**2 / expected).sum()
+
+
+def _cramers_row(i, codes, n_levels, has_missing):
+    """
+    Cramers V statistics of column 'i' with columns i, i+1, ... given the
+    integer codes of every column (-1 for missing), their numbers of
+    levels and whether they have missing values
+    """
+    res = np.empty(len(codes) - i)
+    ci, ki = codes[i].astype(np.intp), n_levels[i]
+    for j in range(i, len(codes)):
+        cj, kj = codes[j], n_levels[j]
+        keys = ci * kj + cj
+        if has_missing[i] or has_missing[j]:
+            keys = keys[(ci >= 0) & (cj >= 0)]
+        table = np.bincount(keys, minlength=ki * kj).reshape(ki, kj)
+        # levels only seen alongside missing values, as pd.crosstab drops them
+        table = table[table.any(axis=1)][:, table.any(axis=0)]
+        n = table.sum()
+        r, k = table.shape
+        with np.errstate(divide='ignore', invalid='ignore'):
+            phi2corr = max(0, _chi2(table)/n - ((k-1)*(r-1))/(n-1))
+            rcorr = r - ((r-1)**2)/(n-1)
+            kcorr = k - ((k-1)**2)/(n-1)
+            res[j - i] = np.sqrt(phi2corr / min((kcorr-1), (rcorr-1)))
+    return res
+
+
+_CODES = None
+
+
+def _init_worker(codes, n_levels, has_missing):
+    """
+    Keep the codes in each worker process, so they are sent once per
+    worker rather than with every row
+    """
+    global _CODES # pylint: disable=global-statement
+    _CODES = (codes, n_levels, has_missing)
+
+
+def _worker_row(i):
+    """`_cramers_row` of column 'i' on the codes kept by `_init_worker`"""
+    return _cramers_row(i, *_CODES)
+
+
+def cramers_corrected_matrix(df, reorder_cuthill_mckee = True, n_jobs = 1):
     """
     Calculate Cramers V statistic with bias correction for all
     combinations of columns in pandas DataFrame df
+
+    Each column is factorized once, and the contingency table of each
+    pair comes from a bincount of their codes
     
     Parameters
     --------------------------
@@ -44,19 +108,37 @@ def cramers_corrected_matrix(df, reorder_cuthill_mckee = True):
     reorder_cuthill_mckee : boolean - whether to reorder to the columns
         based on the reverse Cuthill McKee algorithm applied to the
         matrix of Cramers V statistics
+
+    n_jobs : int - number of worker processes computing the statistics,
+        -1 uses all processors
         
     Returns
     ---------------------------
     Z : numpy array with Cramers V statistics
     """
+    if n_jobs == 0 or n_jobs < -1:
+        raise ValueError("n_jobs must be a positive integer or -1")
     cols = df.columns.tolist()
+    codes, n_levels, has_missing = [], [], []
+    for col in cols:
+        c, uniques = pd.factorize(df[col])
+        codes.append(c.astype(np.min_scalar_type(-len(uniques) - 1)))
+        n_levels.append(len(uniques))
+        has_missing.append(bool((c < 0).any()))
+
+    if n_jobs == 1:
+        rows = [_cramers_row(i, codes, n_levels, has_missing)
+                for i in range(len(cols))]
+    else:
+        n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        with ProcessPoolExecutor(
+                max_workers=n_jobs, initializer=_init_worker,
+                initargs=(codes, n_levels, has_missing)) as ex:
+            rows = list(ex.map(_worker_row, range(len(cols))))
+
     Z = np.zeros((len(cols),len(cols)))
-    
-    for i,j in combinations_with_replacement(range(len(cols)),2):
-        z = cramers_corrected_stat(
-                pd.crosstab(df[cols[i]],df[cols[j]]).values
-            )
-        Z[i,j] = Z[j,i] = z
+    for i, row in enumerate(rows):
+        Z[i, i:] = Z[i:, i] = row
         
     if reorder_cuthill_mckee is True:
         perm = reverse_cuthill_mckee(
@@ -64,8 +146,7 @@ def cramers_corrected_matrix(df, reorder_cuthill_mckee = True):
             symmetric_mode = True
         )
         cols = [cols[i] for i in perm]
-        gx,gy = np.meshgrid(perm,perm)
-        Z = (csr_matrix(Z)[gx,gy]).toarray()
+        Z = Z[np.ix_(perm, perm)]
         
     Z = pd.DataFrame(
             Z,
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strappy.utils.aggregates import histogram_table, contingency_table, _categorical_levels
+from strappy.utils.histograms import _numeric_histogram, _categorical_histogram
+
+
+@pytest.fixture
+def example_data():
+    return pd.DataFrame({
+        'x': [0, 1, 2.2, 1, 3.1, -0.23, 1, 2.3, 0, -0.5, 2, 1.1],
+        'c': list('aaaaabbbccde'),
+        'y': [1, 0, 1, 1, 0, np.nan, 1, 0, 0, 1, 1, 0]})
+
+def test_categorical_levels(example_data):
+    codes, labels = _categorical_levels(example_data, 'c', max_levels=2)
+    assert labels.tolist() == ['_OTHER_', 'a', 'b']
+    assert codes.tolist() == [1] * 5 + [2] * 3 + [0] * 4
+
+def test_histogram_table_categorical(example_data):
+    p = histogram_table(
+        example_data, 'c', 'y', stats=['count', 'sum', 'mean', 'rate'], max_levels=2)
+    p = p.set_index(['variable', 'stat', 'c'])['value']
+    assert p['c', 'count'].tolist() == [4, 5, 3]
+    assert p['y', 'count'].tolist() == [4, 5, 2]
+    assert p['y', 'sum'].tolist() == [2, 3, 1]
+    assert p['y', 'mean'].tolist() == [0.5, 0.6, 0.5]
+    assert p['y', 'rate'].tolist() == [0.5, 0.6, 0.5]
+
+def test_group_stats_string_column(example_data):
+    df = example_data.assign(s=['u', None, 'v', 'w', 'u', 'v', 'w', None, 'u', 'v', 'w', 'u'])
+    p = _categorical_histogram(df, 'c', 's', stat='count', max_levels=2)
+    assert p['s'].tolist() == [4, 4, 2]
+    p = _categorical_histogram(df, 'c', 's', stat='nunique', max_levels=2)
+    assert p['s'].tolist() == [3, 3, 2]
+
+def test_group_stats_large_int_sum(example_data):
+    df = example_data.assign(n=np.int64(2**60 + 1) + np.arange(12))
+    p = _categorical_histogram(df, 'c', 'n', stat='sum', max_levels=2)
+    expected = df.n.groupby(df.c.where(df.c.isin(['a', 'b']), '_OTHER_')).sum()
+    assert p['n'].tolist() == expected.tolist()
+
+def test_histogram_table_numeric(example_data):
+    p = histogram_table(example_data, 'x', 'y', max_levels=3, binner=True)
+    q = _numeric_histogram(example_data, 'x', 'y', max_levels=3)
+    assert p.loc[p.variable == 'x', 'value'].tolist() == q['_COUNT_'].tolist()
+    assert np.allclose(p.loc[p.variable == 'y', 'value'], q['y'], equal_nan=True)
+    assert p.loc[p.variable == 'y', 'x'].tolist() == q['x'].astype(str).tolist()
+
+def test_contingency_table(example_data):
+    df = example_data.assign(d=list('xyxyxyxyxyx') + [None])
+    table, cx, cy = contingency_table(df, 'c', 'd')
+    expected = df.fillna({'d': 'MISSING'}).groupby(['c', 'd']).size().unstack(0)
+    pd.testing.assert_frame_equal(table, expected, check_dtype=False)
+    assert cx.tolist() == [5, 3, 2, 1, 1]
+    assert cy.to_dict() == {'MISSING': 1, 'x': 6, 'y': 5}
+    table, cx, cy = contingency_table(df, 'c', 'd', max_levels=2)
+    assert cx.to_dict() == {'_OTHER_': 4, 'a': 5, 'b': 3}
+    assert table.loc['x'].tolist() == [2, 3, 1]
+    assert cy.to_dict() == {'_OTHER_': 1, 'x': 6, 'y': 5}
@@ -6,10 +6,16 @@ import math
 from strappy.utils.binners import (
     cutpoints,
     human_readable_num,
+    human_readable_nums,
     cutter,
     binner_df,
+    bin_frame,
     _log_spcl,
-    _order_of_mag
+    _order_of_mag,
+    _orders_of_mag,
+    _point_mass,
+    _remove_closest,
+    _weighted_quantile
 )
 
 def test_cutpoints():
@@ -22,6 +28,12 @@ def test_human_readable_num():
     assert human_readable_num(20.321) == '20.3'
     assert human_readable_num(20321) == '20.3K'
 
+def test_human_readable_nums():
+    x = np.array([np.nan, 0, 20.321, 20321, -0.000123, 0.05, 1e6, 1e21])
+    assert human_readable_nums(x).tolist() == [human_readable_num(i) for i in x]
+    x = np.linspace(-1e7, 1e7, 1001)
+    assert human_readable_nums(x).tolist() == [human_readable_num(i) for i in x]
+
 
 @pytest.fixture
 def example_data():
@@ -63,10 +75,85 @@ def test_binner_df(example_data, example_data_binned):
     print(z)
     assert df.equals(z)
 
+def test_bin_frame(example_data):
+    rng = np.random.default_rng(0)
+    df = example_data.assign(
+        y = rng.normal(size=12),
+        z = [np.nan, 1, 1, 1, 2, 3, 4, 5, 6, np.nan, 7, 8],
+        w = list('abcdefghijkl'))
+    out = bin_frame(df, max_levels=3, block_size=2)
+    assert list(out.columns) == list(df.columns)
+    assert out['w'].equals(df['w'])
+    for x in ['x', 'y', 'z']:
+        assert pd.Series(out[x].array).equals(pd.Series(cutter(df, x, 3)))
+    out = bin_frame(df, columns=['x', 'z'], suffix='_bin', max_levels=3)
+    assert list(out.columns) == list(df.columns) + ['x_bin', 'z_bin']
+    assert out['x'].equals(df['x'])
+
+def test_bin_frame_sig_fig(example_data):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'x': rng.lognormal(3, 1, 500), 'y': rng.normal(100, 7, 500)})
+    out = bin_frame(df, max_levels=5, sig_fig=4)
+    for x in ['x', 'y']:
+        assert pd.Series(out[x].array).equals(pd.Series(cutter(df, x, 5, sig_fig=4)))
+
+def test_bin_frame_arguments(example_data):
+    with pytest.raises(TypeError, match='weights'):
+        bin_frame(example_data, weights='x')
+    for n_jobs in [0, -2]:
+        with pytest.raises(ValueError, match='n_jobs'):
+            bin_frame(example_data, n_jobs=n_jobs)
+
 def test_log_spcl():
     assert _log_spcl(0) == 0
     assert math.log(abs(-2.34),10) == _log_spcl(-2.34)
 
 def test_order_of_mag():
     assert _order_of_mag(0) == 0
-    assert _order_of_mag(123456) == 5
\ No newline at end of file
+    assert _order_of_mag(123456) == 5
+
+def test_orders_of_mag():
+    x = np.array([0, 1, 999, 1000, -0.02, 123456, 1e-7])
+    assert _orders_of_mag(x).tolist() == [_order_of_mag(i) for i in x]
+
+def test_point_mass():
+    x = pd.Series([0, 0, 0, 1, 2, 2, np.nan, 3, 4, 5, 6, 7])
+    assert _point_mass(x, threshold = 0.1).tolist() == [0, 2]
+    assert _point_mass(x, threshold = 0.2).tolist() == [0]
+    assert _point_mass(x.astype(str), threshold = 0.2).tolist() == ['0.0']
+
+def test_remove_closest():
+    x = np.array([0, 1, 2, 3, 4, 5])
+    assert _remove_closest(x, np.array([0.1, 2.5, 4.9])).tolist() == [0, 3, 5]
+    assert _remove_closest(x, np.array([0.1]), exclude_endpoints=False).tolist() == [1, 2, 3, 4, 5]
+
+
+def test_weighted_quantile():
+    x = np.array([3., 1., 2., 5.])
+    w = np.array([2, 1, 3, 1])
+    q = np.array([0, 0.1, 0.5, 0.77, 1])
+    assert np.array_equal(
+        _weighted_quantile(x, w.astype(float), q), np.quantile(np.repeat(x, w), q))
+
+def test_cutter_weights():
+    df = pd.DataFrame({'x': [0, 1.5, 2.2, 7.1, np.nan, 40.], 'n': [50, 3, 9, 2, 4, 1]})
+    exploded = df.loc[df.index.repeat(df.n)]
+    assert _point_mass(df.x, weights=df.n).tolist() == [0, 2.2]
+    for cuts in ['linear', 'quantile']:
+        z = cutter(df, 'x', 4, weights='n', cuts=cuts)
+        assert list(z.categories) == list(cutter(exploded, 'x', 4, cuts=cuts).categories)
+
+def test_cutter_arrays(tmp_path):
+    rng = np.random.default_rng(0)
+    x = np.where(rng.random(1000) < 0.2, 0, rng.normal(size=1000))
+    x[:10] = np.nan
+    expected = cutter(pd.DataFrame({'x': x}), 'x', 5)
+    assert pd.Series(cutter(x, max_levels=5)).equals(pd.Series(expected))
+    np.save(tmp_path / 'x.npy', x)
+    m = np.load(tmp_path / 'x.npy', mmap_mode='r')
+    assert pd.Series(cutter(m, max_levels=5, block_size=64)).equals(pd.Series(expected))
+    assert np.array_equal(cutpoints(m), cutpoints(x[~np.isnan(x)]))
+
+def test_human_readable_num_array_scalar():
+    assert human_readable_num(np.array(20321.0)) == '20.3K'
+    assert human_readable_num(np.array([0.05])[0]) == human_readable_num(0.05)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strappy.utils.cache import enable_cache, disable_cache, fingerprint, cached
+from strappy.utils.histograms import (
+    _numeric_histogram, _categorical_histogram, _heatmap_data)
+
+
+@pytest.fixture
+def example_data():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'x': rng.normal(size=500),
+        'c': rng.choice(list('abcde'), size=500),
+        'y': rng.integers(0, 2, size=500)})
+
+@pytest.fixture
+def cache():
+    yield enable_cache(maxsize=4)
+    disable_cache()
+
+def test_fingerprint(example_data):
+    key = fingerprint(example_data, ['x'], max_levels=5)
+    assert key == fingerprint(example_data.reset_index(drop=True), ['x'], max_levels=5)
+    assert key == fingerprint(example_data, ['x'], max_levels=5, ax=object())
+    assert key != fingerprint(example_data, ['x'], max_levels=6)
+    assert key != fingerprint(example_data.assign(x=example_data.x + 1), ['x'], max_levels=5)
+
+def test_cached_histograms(example_data, cache):
+    p = _numeric_histogram(example_data, 'x', 'y', max_levels=5)
+    assert (cache.hits, cache.misses) == (0, 1)
+    p['y'] = 0
+    q = _numeric_histogram(example_data, 'x', 'y', max_levels=5)
+    assert (cache.hits, cache.misses) == (1, 1)
+    disable_cache()
+    assert q.equals(_numeric_histogram(example_data, 'x', 'y', max_levels=5))
+    enable_cache()
+    assert _categorical_histogram(example_data, 'c', max_levels=2) \
+        .equals(_categorical_histogram(example_data, 'c', max_levels=2))
+    assert not _categorical_histogram(example_data, 'c', max_levels=3) \
+        .equals(_categorical_histogram(example_data, 'c', max_levels=2))
+
+def test_disk_cache(example_data, tmp_path):
+    args = ('categorical_heatmap', example_data, list(example_data.columns),
+            dict(x='c', y='y', stat='size', fillna='MISSING',
+                 max_levels=None, oth_val='_OTHER_'))
+    expected = _heatmap_data(example_data, 'c', 'y')
+    try:
+        enable_cache(path=tmp_path)
+        cached(*args, lambda: _heatmap_data(example_data, 'c', 'y'))
+        assert len(list(tmp_path.glob('*.pkl'))) == 1
+        # a new process would start with an empty memory tier
+        cache = enable_cache(path=tmp_path)
+        res = cached(*args, lambda: None)
+        assert (cache.hits, cache.misses) == (1, 0)
+        assert all(a.equals(b) for a, b in zip(res, expected))
+        cache.clear(disk=True)
+        assert not list(tmp_path.glob('*.pkl'))
+    finally:
+        disable_cache()
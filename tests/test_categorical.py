@@ -1,3 +1,4 @@
+import pickle
 import pytest
 import pandas as pd
 import numpy as np
@@ -48,3 +49,126 @@ def test_cumulative_percent_threshold_binner(example_data):
         variables = ['x','y'], cum_percent = 0.85, other_val = '_OTHER_')
     ft = cptb.fit_transform(example_data)
     assert ft.equals(response)
+
+
+def test_transform_output(example_data_na):
+    mlb = MaxLevelBinner(variables = 'x', max_levels = 2).fit(example_data_na)
+    ft = mlb.transform(example_data_na)
+    assert ft.x.tolist()[:6] == ['a','a','b','_OTHER_','b','a']
+    assert ft.x.isna().tolist() == [False]*6 + [True, False, True]
+
+    mlb.output = 'category'
+    ft = mlb.transform(example_data_na)
+    assert ft.x.cat.categories.tolist() == ['a','b','_OTHER_']
+    assert ft.x.cat.codes.tolist() == [0,0,1,2,1,0,-1,0,-1]
+
+    mlb.output = 'codes'
+    ft = mlb.transform(example_data_na)
+    assert ft.x.dtype == np.int8
+    assert ft.x.tolist() == [0,0,1,2,1,0,-1,0,-1]
+    assert example_data_na.x.tolist()[:6] == ['a','a','b','c','b','a']
+
+
+def test_transform_no_copy(example_data):
+    df = example_data[['y']].copy()
+    mlb = MaxLevelBinner(variables = 'y', max_levels = 2, copy = False)
+    ft = mlb.fit_transform(df)
+    assert ft is df
+    assert df.y.tolist() == ['a','b','_OTHER_','_OTHER_','_OTHER_','a','b']
+
+
+@pytest.mark.parametrize("binner", [
+    MaxLevelBinner(variables = 'x', max_levels = 2),
+    PercentThresholdBinner(variables = 'x', percent_threshold = 0.2),
+    CumulativePercentThresholdBinner(variables = 'x', cum_percent = 0.6)])
+def test_partial_fit(binner, example_data_na):
+    ft = binner.fit(example_data_na).transform(example_data_na)
+    levels = binner.map['x']
+    for chunk in [example_data_na.iloc[:3], example_data_na.iloc[3:7], example_data_na.iloc[7:]]:
+        binner.partial_fit(chunk)
+    assert binner.n_samples_seen_ == example_data_na.shape[0]
+    assert binner.counts_['x'].tolist() == [4, 2, 1, 2]
+    assert binner.counts_['x'].index[:3].tolist() == ['a', 'b', 'c']
+    assert pd.Index(list(binner.map['x'])).equals(pd.Index(list(levels)))
+    assert binner.transform(example_data_na).equals(ft)
+
+
+def test_max_level_binner_sketch(example_data):
+    exact = MaxLevelBinner(variables = ['x','y'], max_levels = 2).fit(example_data[['x','y']])
+    mlb = MaxLevelBinner(variables = ['x','y'], max_levels = 2, sketch_size = 3)
+    mlb.partial_fit(example_data.iloc[:4]).partial_fit(example_data.iloc[4:])
+    assert mlb.n_samples_seen_ == 7
+    assert mlb.map == exact.map
+    assert all(v >= 0 for v in mlb.error_bound_.values())
+
+    other = MaxLevelBinner(variables = ['x','y'], max_levels = 2, sketch_size = 3)
+    mlb = MaxLevelBinner(variables = ['x','y'], max_levels = 2, sketch_size = 3) \
+        .fit(example_data.iloc[:4]) \
+        .merge(other.fit(example_data.iloc[4:]))
+    assert mlb.map['x'] == exact.map['x']
+
+
+@pytest.mark.parametrize("binner", [
+    MaxLevelBinner(variables = ['x','y'], max_levels = 2),
+    PercentThresholdBinner(variables = ['x','y'], percent_threshold = 0.15),
+    CumulativePercentThresholdBinner(variables = ['x','y'], cum_percent = 0.85)])
+def test_fit_from_counts(binner, example_data):
+    ft = binner.fit_transform(example_data)
+    counts = {
+        'x': example_data.x.value_counts(),
+        'y': example_data.y.value_counts().to_dict()}
+    assert binner.fit_from_counts(counts).transform(example_data).equals(ft)
+
+
+def test_dictionary_encoded_input(example_data_na):
+    ft = MaxLevelBinner(max_levels = 2, output = 'codes').fit_transform(example_data_na)
+    X = example_data_na.astype('category')
+    mlb = MaxLevelBinner(max_levels = 2, output = 'codes')
+    assert mlb.fit(X).variables_ == ['x']
+    assert mlb.transform(X).equals(ft)
+
+    pa = pytest.importorskip("pyarrow")
+    X = pd.DataFrame({'x': pd.arrays.ArrowExtensionArray(
+        pa.chunked_array([
+            pa.array(example_data_na.x.iloc[:4]).dictionary_encode(),
+            pa.array(example_data_na.x.iloc[4:]).dictionary_encode()]))})
+    mlb = MaxLevelBinner(max_levels = 2, output = 'codes')
+    assert mlb.fit(X).variables_ == ['x']
+    assert mlb.transform(X).equals(ft)
+
+
+
+@pytest.mark.parametrize('binner', [MaxLevelBinner(max_levels = 3, output = 'codes'),
+                                    PercentThresholdBinner(output = 'codes')])
+def test_ordered_category_levels(binner):
+    x = pd.Series(list('cbacbaabd') + [None], dtype=object)
+    X = pd.DataFrame({'x': x})
+    Xc = pd.DataFrame({'x': x.astype(pd.CategoricalDtype(list('dcba'), ordered=True))})
+    ref = binner.fit(X)
+    levels, codes = ref.levels_['x'], ref.transform(X)
+    res = binner.fit(Xc)
+    assert res.levels_['x'].tolist() == levels.tolist() == sorted(levels)
+    assert res.transform(Xc).equals(codes)
+
+def test_pickle(example_data):
+    ptb = PercentThresholdBinner(variables = ['x','y'], percent_threshold = 0.15)
+    ft = ptb.fit_transform(example_data)
+    state = ptb.__getstate__()
+    assert isinstance(state['levels_']['y'][0], bytes)
+    ptb = pickle.loads(pickle.dumps(ptb))
+    assert ptb.levels_['y'].tolist() == ['a', 'b']
+    assert ptb.transform(example_data).equals(ft)
+
+
+@pytest.mark.parametrize("binner", [
+    MaxLevelBinner(variables = 'x', max_levels = 3),
+    PercentThresholdBinner(variables = 'x', percent_threshold = 0.2),
+    CumulativePercentThresholdBinner(variables = 'x', cum_percent = 0.8)])
+def test_map_keeps_missing_level(binner, example_data_na):
+    # the mapping built from the selected levels before they were stored as an Index
+    mapping = binner.fit(example_data_na).map['x']
+    assert [str(k) for k in mapping] == ['a', 'b', 'nan']
+    assert all(k == v or (pd.isna(k) and pd.isna(v)) for k, v in mapping.items())
+    assert binner.levels_['x'].tolist() == ['a', 'b']
+    restored = pickle.loads(pickle.dumps(binner)).map['x']
+    assert [str(k) for k in restored] == ['a', 'b', 'nan']
@@ -1,7 +1,7 @@
 import pytest
 import pandas as pd
 import numpy as np
-from strappy.utils.data_split import data_split
+from strappy.utils.data_split import data_split, stream_data_split, group_kfold
 
 def test_data_split():
     np.random.seed(42)
@@ -19,4 +19,95 @@ def test_data_split():
         "TRAIN","TRAIN","TRAIN","TEST","OOT",
         "TRAIN","TRAIN","VAL","TRAIN","OOT"])
 
-    assert z.equals(data_split(df, oot_dt='2021-01-01',oot_dt_col='dt'))
\ No newline at end of file
+    assert z.equals(data_split(df, oot_dt='2021-01-01',oot_dt_col='dt'))
+
+def test_data_split_hash():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"k": rng.integers(0, 500, 5000), "x": rng.random(5000)})
+    res = data_split(df, strat_col="k", method="hash", categorical=True)
+    assert list(res.SPLIT.cat.categories) == ["TRAIN", "TEST", "VAL", "OOT"]
+    assert (res.groupby("k").SPLIT.nunique() == 1).all()
+    assert abs((res.SPLIT == "TRAIN").mean() - 0.8) < 0.1
+    # the split of a key does not depend on the rest of the data
+    part = data_split(df.iloc[::-3], strat_col="k", method="hash", categorical=True)
+    assert part.SPLIT.equals(res.SPLIT.loc[part.index])
+    assert not part.SPLIT.equals(
+        data_split(df.iloc[::-3], strat_col="k", method="hash", seed=1, categorical=True).SPLIT)
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_stream_data_split(tmp_path, file_format):
+    if file_format == "parquet":
+        pytest.importorskip("pyarrow")
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "k": rng.choice(list("abcdefghijklmnopqrstuvwxyz"), 1000),
+        "dt": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1000, 1000), "D"),
+        "x": rng.random(1000)})
+    source = str(tmp_path / f"data.{file_format}")
+    getattr(df, f"to_{file_format}")(source, index=False)
+    df = pd.read_csv(source) if file_format == "csv" else pd.read_parquet(source)
+    for strat_col in [None, "k"]:
+        out = tmp_path / f"out_{strat_col}"
+        counts = stream_data_split(
+            source, out, strat_col=strat_col, oot_dt_col="dt",
+            oot_dt="2022-06-01", chunksize=128)
+        expected = data_split(
+            df, strat_col=strat_col, oot_dt_col="dt", oot_dt="2022-06-01", method="hash")
+        assert counts.to_dict() == expected.SPLIT.value_counts().reindex(counts.index).to_dict()
+        for split in counts.index:
+            res = pd.read_csv(out / f"{split}.csv") if file_format == "csv" \
+                else pd.read_parquet(out / f"{split}.parquet")
+            assert res.equals(df[expected.SPLIT == split].reset_index(drop=True))
+
+
+def test_stream_data_split_chunk_dtypes(tmp_path):
+    # the key is read as int, float (with a missing value) or object
+    # (with a string) depending on the chunk
+    k = np.tile(np.arange(50), 6).astype(object)
+    k[120] = np.nan
+    k[250] = "a"
+    df = pd.DataFrame({"id": np.arange(len(k)), "k": k})
+    source = str(tmp_path / "data.csv")
+    df.to_csv(source, index=False)
+    counts = stream_data_split(source, tmp_path / "out", strat_col="k", chunksize=100)
+    split = pd.concat([
+        pd.read_csv(tmp_path / "out" / f"{s}.csv").assign(SPLIT=s) for s in counts[counts > 0].index]) \
+        .set_index("id").SPLIT.reindex(df.id)
+    keys = pd.Series(k).astype(str).str.replace(r"\.0$", "", regex=True)
+    assert split.groupby(keys.values).nunique().max() == 1
+    expected = data_split(pd.DataFrame({"k": np.tile(np.arange(50), 6)}), strat_col="k", method="hash")
+    mask = split.notna().values & (keys != "a").values
+    assert (split.values[mask] == expected.SPLIT.values[mask]).all()
+
+
+def test_group_kfold():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "k": rng.integers(0, 50, 1000).astype(float),
+        "dt": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1000, 1000), "D")})
+    df.loc[:9, "k"] = np.nan
+    keep = (df.dt < "2022-06-01") & df.k.notna()
+    folds = list(group_kfold(df, 4, strat_col="k", oot_dt_col="dt", oot_dt="2022-06-01"))
+    assert len(folds) == 4
+    validation = np.concatenate([v for _, v in folds])
+    assert np.array_equal(np.sort(validation), np.flatnonzero(keep))
+    for train, val in folds:
+        assert len(train) + len(val) == keep.sum()
+        assert not set(df.k.iloc[train]) & set(df.k.iloc[val])
+    assert all(np.array_equal(a[1], b[1]) for a, b in zip(
+        folds, group_kfold(df, 4, strat_col="k", oot_dt_col="dt", oot_dt="2022-06-01")))
+    sizes = [len(v) for _, v in group_kfold(df, 3)]
+    assert sorted(sizes) == [333, 333, 334]
+
+
+def test_data_split_hash_key_dtype():
+    keys = np.arange(200)
+    as_int = data_split(pd.DataFrame({"k": keys}), strat_col="k", method="hash")
+    # a refresh with one missing key reads the column as float
+    refreshed = pd.DataFrame({"k": np.append(keys, np.nan)})
+    as_float = data_split(refreshed, strat_col="k", method="hash")
+    as_str = data_split(pd.DataFrame({"k": keys.astype(str)}), strat_col="k", method="hash")
+    assert as_float.SPLIT.iloc[:200].equals(as_int.SPLIT)
+    assert as_str.SPLIT.equals(as_int.SPLIT)
+    assert as_float.SPLIT.iloc[200] is None
@@ -4,7 +4,7 @@ Test dates
 
 import pytest
 import pandas as pd
-from strappy.utils.dates import bin_dates
+from strappy.utils.dates import bin_dates, DateBinner
 
 @pytest.fixture
 def example_data():
@@ -39,4 +39,27 @@ def test_bin_dates(example_data,correct_result):
             .to_frame()
             .assign(dt = lambda df: pd.to_datetime(df.dt)))
 
-    pd.testing.assert_frame_equal(res,correct_result)
\ No newline at end of file
+    pd.testing.assert_frame_equal(res,correct_result)
+
+def test_bin_dates_intervals(example_data):
+    res = bin_dates(example_data.dt, bins=5, midpoints=False)
+    expected = pd.cut(example_data.dt, res.cat.categories.right.insert(0, res.cat.categories[0].left))
+    assert res.astype(str).equals(expected.astype(str))
+
+@pytest.mark.parametrize('bins, freq', [('day', 'D'), ('week', 'W-SUN'), ('month', 'M'), ('year', 'Y')])
+def test_date_binner_units(bins, freq):
+    d = pd.Series(pd.date_range('2019-12-25', periods=500, freq='17h')).where(lambda s: s.index % 7 > 0)
+    binner = DateBinner(bins, label='left').fit(d)
+    expected = d.dt.to_period(freq).dt.start_time
+    assert pd.Series(binner.transform(d)).equals(expected)
+    codes = binner.transform(d, codes=True)
+    assert (codes[d.isna()] == -1).all()
+    assert codes.max() == len(binner.labels_) - 1
+    assert binner.labels_[0] == expected.min()
+
+def test_date_binner_width():
+    d = pd.Series(pd.to_datetime(['2021-03-01 05:00', '2021-03-01 06:00', '2021-03-02 23:59']))
+    binner = DateBinner('6h').fit(d)
+    assert binner.transform(d, codes=True).tolist() == [0, 1, 7]
+    assert binner.labels_[0] == pd.Timestamp('2021-03-01 03:00')
+    assert binner.transform(pd.Series(pd.to_datetime(['2021-03-05'])), codes=True).tolist() == [-1]
@@ -5,11 +5,15 @@ pytest --mpl-generate-path=tests/baseline
 """
 
 import pytest
+import numpy as np
 import pandas as pd
 from strappy.utils.histograms import (
+    _numeric_histogram,
     numeric_histogram,
     categorical_histogram,
-    categorical_heatmap)
+    categorical_heatmap,
+    _numeric_heatmap_data)
+from strappy.utils.binners import cutter
 
 @pytest.fixture
 def example_data():
@@ -35,6 +39,17 @@ def test_numeric_histogram(example_data):
     return nh
 
 
+@pytest.mark.parametrize('binner', [True, False])
+def test_numeric_histogram_weights(example_data, binner):
+    df = example_data.assign(n = [1, 2, 3, 1, 1, 2, 3, 1, 1, 2, 3, 1])
+    exploded = df.loc[df.index.repeat(df.n)]
+    p = _numeric_histogram(df, 'x', 'n', max_levels=3, binner=binner, weights='n')
+    q = _numeric_histogram(exploded, 'x', 'n', max_levels=3, binner=binner)
+    assert p['x'].astype(str).tolist() == q['x'].astype(str).tolist()
+    assert np.allclose(p['_COUNT_'], q['_COUNT_'])
+    assert np.allclose(p['n'], q['n'], equal_nan=True)
+
+
 @pytest.mark.mpl_image_compare
 def test_categorical_histogram(example_data):
     nh = categorical_histogram(
@@ -52,4 +67,15 @@ def test_categorical_heatmap(example_data):
         example_data,
         x='y',
         y='z')
-    return nh
\ No newline at end of file
+    return nh
+
+def test_numeric_heatmap_data(example_data):
+    df = example_data.assign(w = [5, 1, 2, np.nan, 0, 0, 3, 1, 2, 4, 0, 1])
+    table, cx, cy = _numeric_heatmap_data(df, 'x', 'w', max_levels=3)
+    bx, bw = cutter(df, 'x', 3), cutter(df, 'w', 3)
+    assert cx.index.tolist() == list(bx.categories)[:-1]
+    assert cy.index.tolist() == list(bw.categories)
+    expected = pd.crosstab(np.asarray(bw), np.asarray(bx))
+    assert table.fillna(0).loc[expected.index, expected.columns].equals(
+        expected.astype(float).rename_axis(index='w', columns='x'))
+    assert cx.sum() == cy.sum() == len(df)
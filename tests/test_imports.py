@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize('module', [
+    'strappy', 'strappy.transformers', 'strappy.monitoring.psi',
+    'strappy.utils.binners', 'strappy.utils.histograms'])
+def test_lazy_imports(module):
+    code = (f"import sys, {module}; "
+            "print(','.join(m for m in ['matplotlib', 'sklearn', 'feature_engine', 'tomllib']"
+            " if m in sys.modules))")
+    res = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert res.stdout.strip() == ''
+
+def test_lazy_attributes():
+    import strappy
+    import strappy.transformers
+    from strappy.transformers._numeric_binner import NumericBinner
+    assert strappy._cfg == {}
+    assert strappy.transformers.NumericBinner is NumericBinner
+    assert 'MaxLevelBinner' in dir(strappy.transformers)
+    with pytest.raises(AttributeError):
+        strappy.transformers.NotATransformer
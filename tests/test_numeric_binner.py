@@ -0,0 +1,75 @@
+import pytest
+import pandas as pd
+import numpy as np
+
+from strappy.transformers import NumericBinner
+from strappy.utils.binners import cutter
+
+
+@pytest.fixture
+def example_data():
+    return(
+        pd.DataFrame(
+           {'x':[
+               0, 1, 2.2, 1, 3.1,
+               -0.23, 1, 2.3, 0, -0.5,
+               2, 1.1 ],
+            'y':[
+               10, 1, np.nan, 3, 400,
+               5, 6, 7, 8, 9,
+               11, 12 ],
+            'z':list('abcdefghijkl')}
+    ))
+
+
+def test_numeric_binner(example_data):
+    nb = NumericBinner(max_levels = 3).fit(example_data)
+    assert nb.variables_ == ['x','y']
+    res = nb.transform(example_data)
+    assert res.z.equals(example_data.z)
+    for v in ['x','y']:
+        ref = cutter(example_data, v, 3)
+        assert nb.labels_[v] + ['MISSING'] == ref.categories.tolist()
+        assert np.array_equal(
+            res[v].values,
+            np.where(ref.codes == len(nb.labels_[v]), -1, ref.codes))
+
+
+
+def test_numeric_binner_no_qntl_cutoff(example_data):
+    nb = NumericBinner(max_levels = 3, qntl_cutoff = None).fit(example_data)
+    for v in ['x','y']:
+        ref = cutter(example_data, v, 3, qntl_cutoff = None)
+        assert nb.labels_[v] + ['MISSING'] == ref.categories.tolist()
+
+def test_numeric_binner_category(example_data):
+    nb = NumericBinner(variables = 'x', max_levels = 3, output = 'category')
+    res = nb.fit(example_data).transform(example_data.assign(x = lambda df: df.x + 0.5))
+    ref = cutter(example_data, 'x', 3)
+    assert res.x.cat.categories.tolist() == ref.categories.tolist()
+    assert res.x.tolist()[:4] == ['03: (0, 1)'] + ['05: (1, 2.98]']*3
+    assert res.x.tolist()[4] == 'MISSING'
+
+
+def test_numeric_binner_partial_fit(example_data):
+    nb = NumericBinner(max_levels = 3).fit(example_data)
+    res = nb.transform(example_data)
+    nb2 = NumericBinner(max_levels = 3) \
+        .partial_fit(example_data.iloc[:5]) \
+        .merge(NumericBinner(max_levels = 3).partial_fit(example_data.iloc[5:]))
+    assert nb2.rank_error_ == {'x': 0, 'y': 0}
+    assert nb2.labels_ == nb.labels_
+    assert nb2.transform(example_data).equals(res)
+
+
+def test_numeric_binner_sketch():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'x': rng.normal(size=50000)})
+    nb = NumericBinner(max_levels = 10, cuts = 'quantile').fit(df)
+    nb2 = NumericBinner(max_levels = 10, cuts = 'quantile')
+    for start in range(0, len(df), 5000):
+        nb2.partial_fit(df.iloc[start:start + 5000])
+    assert 0 < nb2.rank_error_['x'] < 0.02
+    ranks = np.searchsorted(np.sort(df.x), nb2.bins_['x'][1:-1]) / len(df)
+    exact = np.searchsorted(np.sort(df.x), nb.bins_['x'][1:-1]) / len(df)
+    assert np.abs(ranks - exact).max() <= nb2.rank_error_['x'] + 0.01
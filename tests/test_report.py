@@ -0,0 +1,35 @@
+import re
+import numpy as np
+import pandas as pd
+import pytest
+
+from strappy.utils.report import eda_report
+
+
+@pytest.fixture
+def example_data():
+    rng = np.random.default_rng(0)
+    n = 200
+    return pd.DataFrame({
+        'x': rng.normal(size=n),
+        'y': rng.choice(list('abc'), n),
+        'd': pd.date_range('2021-01-01', periods=n, freq='D'),
+        't': rng.integers(0, 2, n)})
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_eda_report(example_data, tmp_path, n_jobs):
+    summary = eda_report(example_data, tmp_path, line_columns='t', n_jobs=n_jobs)
+    assert summary['column'].tolist() == ['x', 'y', 'd']
+    assert summary['kind'].tolist() == ['numeric', 'categorical', 'date']
+    assert summary['error'].isna().all()
+    for file in summary['file']:
+        assert (tmp_path / file).stat().st_size > 0
+    index = (tmp_path / 'index.html').read_text()
+    assert all(f'src="{file}"' in index for file in summary['file'])
+
+def test_eda_report_failed_columns(example_data, tmp_path):
+    df = example_data.rename(columns={'x': 'x <1>', 'y': 'y "2"'})
+    summary = eda_report(df, tmp_path, line_columns='t', stat='no_such_stat')
+    assert summary['file'].isna().all() and summary['error'].notna().all()
+    ids = re.findall(r'<section id="([^"]*)"', (tmp_path / 'index.html').read_text())
+    assert ids == ['0000_x_1_', '0001_y_2_', '0002_d']
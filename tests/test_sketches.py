@@ -0,0 +1,124 @@
+"""
+Test sketches module
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from strappy.utils.sketches import (
+    FrequentItemsSketch,
+    QuantileSketch,
+    NumericSketch,
+    HyperLogLog,
+    more_distinct_than)
+
+
+@pytest.fixture
+def example_data():
+    """Skewed data with a few heavy hitters and a long tail"""
+    rng = np.random.default_rng(0)
+    heavy = np.repeat(['a', 'b', 'c'], [3000, 2000, 1000])
+    tail = rng.integers(0, 5000, 4000).astype(str)
+    x = np.concatenate([heavy, tail])
+    rng.shuffle(x)
+    return pd.Series(x)
+
+
+def test_frequent_items_sketch(example_data):
+    sk = FrequentItemsSketch(max_items=50).update(example_data, block_size=1000)
+    exact = example_data.value_counts()
+    assert len(sk) <= 50
+    assert sk.n == len(example_data)
+    assert sk.top(3).index.tolist() == ['a', 'b', 'c']
+    err = exact[sk.counts.index] - sk.counts
+    assert (err >= 0).all() and (err <= sk.error_bound).all()
+
+
+def test_frequent_items_sketch_merge(example_data):
+    sk1 = FrequentItemsSketch(max_items=50).update(example_data.iloc[:5000])
+    sk2 = FrequentItemsSketch(max_items=50).update(example_data.iloc[5000:])
+    sk = sk1.merge(sk2)
+    assert sk.n == len(example_data)
+    assert sk.top(3).index.tolist() == ['a', 'b', 'c']
+    err = example_data.value_counts()[sk.counts.index] - sk.counts
+    assert (err >= 0).all() and (err <= sk.error_bound).all()
+
+
+
+def test_frequent_items_sketch_error_bound():
+    # a retained counter must not lose a block's small count on top of the shrink
+    sk = FrequentItemsSketch(max_items=1).update(pd.Series(['y'] * 10)) \
+        .update(pd.Series(['a'] * 5 + ['b'] * 5 + ['y']))
+    assert 11 - sk.counts.get('y', 0) <= sk.error_bound
+    rng = np.random.default_rng(1)
+    x = pd.Series(rng.zipf(1.5, 20000) % 500)
+    sketches = [FrequentItemsSketch(max_items=20).update(chunk, block_size=300)
+                for chunk in np.array_split(x, 8)]
+    sk = sketches[0]
+    for other in sketches[1:]:
+        sk.merge(other)
+    exact = x.value_counts()
+    est = sk.counts.reindex(exact.index, fill_value=0)
+    assert sk.n == len(x) and sk.error_bound > 0
+    assert (est <= exact).all() and (exact - est <= sk.error_bound).all()
+    assert exact.index[exact > sk.error_bound].isin(sk.counts.index).all()
+
+def test_frequent_items_sketch_exact():
+    x = pd.Series(['a', 'b', 'a', np.nan, 'c', 'a', np.nan])
+    sk = FrequentItemsSketch(max_items=10).update(x)
+    assert sk.error_bound == 0
+    assert sk.counts.tolist() == [3, 2, 1, 1]
+
+
+def test_quantile_sketch():
+    rng = np.random.default_rng(0)
+    x = rng.lognormal(size=100000)
+    q = np.linspace(0, 1, 21)
+    sk = QuantileSketch(k=200, seed=0)
+    for chunk in np.array_split(x, 7):
+        sk.update(chunk)
+    assert sk.n == len(x) and sk.min == x.min() and sk.max == x.max()
+    ranks = np.searchsorted(np.sort(x), sk.quantile(q)) / len(x)
+    assert np.abs(ranks - q).max() <= sk.rank_error
+
+    sk = QuantileSketch(k=200, seed=0).update(x[:50000]) \
+        .merge(QuantileSketch(k=200, seed=1).update(x[50000:]))
+    ranks = np.searchsorted(np.sort(x), sk.quantile(q)) / len(x)
+    assert np.abs(ranks - q).max() <= sk.rank_error
+
+
+def test_quantile_sketch_exact():
+    x = np.array([1.213, 43, 9.32, np.nan, 4.22324, -1.6, 5.2321, 32, 0.123])
+    sk = QuantileSketch().update(x)
+    assert sk.rank_error == 0
+    assert np.array_equal(sk.quantile([0.025, 0.5, 0.975]), np.nanquantile(x, [0.025, 0.5, 0.975]))
+    assert sk.without([43.0]).max == 32
+
+
+def test_numeric_sketch():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=20000)
+    x[:3000] = 0
+    x[3000:4000] = np.nan
+    sk = NumericSketch(k=100, max_items=50).update(x[:10000]) \
+        .merge(NumericSketch(k=100, max_items=50).update(x[10000:]))
+    assert sk.n_missing == 1000
+    assert sk.n == 19000
+    assert sk.point_mass(0.1).tolist() == [0]
+
+def test_hyperloglog():
+    rng = np.random.default_rng(0)
+    x = rng.integers(0, 50_000, 200_000)
+    a = HyperLogLog().update(x[:100_000])
+    b = HyperLogLog().update(x[100_000:])
+    n = len(np.unique(x))
+    assert abs(a.merge(b).estimate() / n - 1) < 3 * a.rse
+    assert round(HyperLogLog().update(['a', 'b', None, 'a']).estimate()) == 3
+
+@pytest.mark.parametrize('threshold', [0, 2, 3, 5])
+def test_more_distinct_than(threshold):
+    x = pd.Series([1, 2, np.nan, 2, 3, 1, np.nan] * 1000)
+    assert more_distinct_than(x, threshold) == (len(x.unique()) > threshold)
+    assert more_distinct_than(x.astype('category'), threshold) == (len(x.unique()) > threshold)
+    assert more_distinct_than(np.arange(100_000), 50_000)
+    assert not more_distinct_than(np.arange(100_000) % 40_000, 50_000)
@@ -27,3 +27,20 @@ def test_cramers_corrected_matrix(example_data):
         index=['z', 'x', 'y'])
     res = cramers_corrected_matrix(example_data)
     pd.testing.assert_frame_equal(res,ans)
+
+
+def test_cramers_corrected_matrix_missing(example_data):
+    df = example_data.assign(w=['a', None, 'b', 'b', 'a', 'c', None, 'c', 'a', 'b', 'a', 'c'])
+    df.loc[3, 'y'] = None
+    res = cramers_corrected_matrix(df, reorder_cuthill_mckee=False)
+    for x in df:
+        for y in df:
+            expected = cramers_corrected_stat(pd.crosstab(df[x], df[y]).values)
+            assert res.loc[x, y] == pytest.approx(expected)
+    pd.testing.assert_frame_equal(res, cramers_corrected_matrix(df, False, n_jobs=2))
+
+
+@pytest.mark.parametrize('n_jobs', [0, -2])
+def test_cramers_corrected_matrix_n_jobs(example_data, n_jobs):
+    with pytest.raises(ValueError, match='n_jobs'):
+        cramers_corrected_matrix(example_data, n_jobs=n_jobs)